@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # offscreen, before pygame is imported
+
+from globals import *
+from universe import Universe
+
+DEFAULT_SIZES = 10, 100, 1000, 10000
+STARTUP_COMMANDS = {  # until the first tick or frame
+    "startup_headless": ["headless.py", "--ticks", "1"],
+    "startup_interactive": ["main.py", "--frames", "1"],
+}
+
+
+def build_universe(n_bodies, n_planets, seed):  # the same seed gives the same universe, runs are comparable
+    universe = Universe(generate=False)
+    universe.reset(n_stars=0, seed=seed)
+    while len(universe.celestial_bodies) < n_bodies:
+        universe.add_star(n_planets=n_planets)
+
+    return universe
+
+
+def time_it(function, n_runs):
+    times = []
+    for i in range(n_runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "runs": n_runs,
+        "mean_ms": statistics.mean(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+    }
+
+
+def benchmark_size(n_bodies, n_planets, n_runs, n_warmup_ticks, seed):
+    universe = build_universe(n_bodies, n_planets, seed)
+    render = universe.render
+    trace_buffer = universe.trace_buffer
+    for i in range(n_warmup_ticks):  # fill the trace buffer
+        universe.tick(SIMULATION_DT)
+
+    def trace_tick():  # one point created and one expired per body, every call
+        universe.age += 1 / trace_buffer.frequency
+        trace_buffer.tick(universe.age)
+
+    results = {
+        "tick": time_it(lambda: universe.tick(SIMULATION_DT), n_runs),
+        "draw": time_it(lambda: universe.draw(universe.get_visible_objects()), n_runs),
+        "draw_trails": time_it(render.draw_trails, n_runs),
+        "draw_screen": time_it(render.draw_screen, n_runs),
+        "trace_tick": time_it(trace_tick, n_runs),
+        "get_hovered_object": time_it(universe.get_hovered_object, n_runs),
+    }
+
+    return [{"size": n_bodies, "bodies": len(universe.celestial_bodies), "name": name, **result}
+            for name, result in results.items()]
+
+
+def benchmark_memory(n_bodies, n_planets, seed):  # everything allocated while building, incl. spare capacity
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    universe = build_universe(n_bodies, n_planets, seed)
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    n = len(universe.celestial_bodies)
+    return {"size": n_bodies, "bodies": n, "bytes_per_body": size / n}
+
+
+def benchmark_startup(n_runs):  # separate processes, so imports, assets and fonts count too
+    return [{"size": 0, "bodies": 0, "name": name,
+             **time_it(lambda: subprocess.run([sys.executable, *command], capture_output=True, check=True), n_runs)}
+            for name, command in STARTUP_COMMANDS.items()]
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, memory, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(result["size"], result["name"]): result for result in json.load(f)["results"]}
+
+    for result in results:
+        old = baseline.get((result["size"], result["name"]))
+        if old:
+            ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else math.inf
+            print(f"{result['bodies']:>6} {result['name']:<20} {old['median_ms']:9.3f}ms -> "
+                  f"{result['median_ms']:9.3f}ms ({ratio:.2f}x)")
+
+    with open(baseline_path) as f:
+        baseline = {result["size"]: result for result in json.load(f).get("memory", [])}
+
+    for result in memory:
+        old = baseline.get(result["size"])
+        if old:
+            print(f"{result['bodies']:>6} {'memory':<20} {old['bytes_per_body']:9.0f}B -> "
+                  f"{result['bytes_per_body']:9.0f}B per body")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the tick, draw and trace hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="approximate number of cel bodies per step")
+    parser.add_argument("--planets", type=int, default=10, help="planets per star")
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per measurement")
+    parser.add_argument("--warmup-ticks", type=int, default=200)
+    parser.add_argument("--seed", type=non_negative_int, default=0, help="of the generated universes")
+    parser.add_argument("--startup-runs", type=int, default=5, help="timed launches per startup path, 0 = skip")
+    parser.add_argument("--output", help="write the results as json to this file")
+    parser.add_argument("--compare", help="json results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    pg.font.init()
+    results = []
+    if args.startup_runs:
+        for result in benchmark_startup(args.startup_runs):
+            print(f"{'':>6} {result['name']:<20} {result['median_ms']:9.3f}ms")
+            results.append(result)
+
+    memory = []
+    for n_bodies in args.sizes:
+        for result in benchmark_size(n_bodies, args.planets, args.runs, args.warmup_ticks, args.seed):
+            print(f"{result['bodies']:>6} {result['name']:<20} {result['median_ms']:9.3f}ms")
+            results.append(result)
+
+        memory.append(benchmark_memory(n_bodies, args.planets, args.seed))
+        print(f"{memory[-1]['bodies']:>6} {'memory':<20} {memory[-1]['bytes_per_body']:9.0f}B per body")
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "pygame": pg.version.ver,
+        "numpy": np.__version__,
+        "seed": args.seed,
+        "results": results,
+        "memory": memory,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        print_comparison(results, memory, args.compare)
+
+
+if __name__ == "__main__":
+    main()
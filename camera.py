@@ -11,14 +11,15 @@ class Camera:
     def set_center(self, new_center):
         self.center_pos = new_center
 
-    def move_center(self, add_x, add_y):
+    def move_center(self, add_x, add_y, dt):
         if not (add_x or add_y):
             return
 
         self.clear_locked_celestial()
         old = self.center_pos
-        self.set_center((old[0] + int(add_x) * CAMERA_MOVEMENT_STEP,
-                         old[1] + int(add_y) * CAMERA_MOVEMENT_STEP))
+        step = CAMERA_MOVEMENT_SPEED * dt / self.get_zoom()  # same speed on screen at any zoom and frame rate
+        self.set_center((old[0] + int(add_x) * step,
+                         old[1] + int(add_y) * step))
 
     def set_locked_celestial(self, celestial_body):
         self.locked_celestial = celestial_body
@@ -28,15 +29,30 @@ class Camera:
 
     def snap_to_locked_celestial(self):
         if self.locked_celestial is not None:
-            self.set_center(self.locked_celestial.get_abs_center())
+            self.set_center(self.locked_celestial.get_render_center())
 
     def snap_to_player(self):
         if self.universe.environment.celestial_body:
             self.set_center(self.universe.environment.player.abs_pos)
 
+    def get_zoom(self):  # environments are never zoomed
+        return 1 if self.universe.environment.celestial_body else self.zoom_factor
+
     def calculate_pos_on_screen(self, abs_pos):
         camera_center = self.center_pos
-        pos_on_screen = round(abs_pos[0] - camera_center[0] + SCREEN_CENTER[0]), \
-            round(abs_pos[1] - camera_center[1] + SCREEN_CENTER[1])
+        zoom = self.get_zoom()
+        pos_on_screen = round((abs_pos[0] - camera_center[0]) * zoom + SCREEN_CENTER[0]), \
+            round((abs_pos[1] - camera_center[1]) * zoom + SCREEN_CENTER[1])
 
         return pos_on_screen
+
+    def calculate_abs_pos(self, pos_on_screen):
+        camera_center = self.center_pos
+        zoom = self.get_zoom()
+        return (pos_on_screen[0] - SCREEN_CENTER[0]) / zoom + camera_center[0], \
+            (pos_on_screen[1] - SCREEN_CENTER[1]) / zoom + camera_center[1]
+
+    def get_abs_screen_rect(self):  # left, top, right, bottom
+        left, top = self.calculate_abs_pos((0, 0))
+        right, bottom = self.calculate_abs_pos((SCREEN_WIDTH, SCREEN_HEIGHT))
+        return left, top, right, bottom
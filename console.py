@@ -1,4 +1,11 @@
+import sys
+
 from globals import *
+from space.moon import Moon
+from space.planet import Planet
+from space.star import Star
+
+QUERY_TYPES = {"stars": Star, "planets": Planet, "moons": Moon}
 
 
 class Console:
@@ -11,7 +18,10 @@ class Console:
         self.position = (40, 200)
 
     def process(self):
-        text = self.input_text.strip()
+        self.execute(self.input_text)
+
+    def execute(self, text):
+        text = text.strip()
         text_lower = text.lower()
         text_lower_split = text_lower.split()
         print(f"Processing input \"{text}\"")
@@ -20,16 +30,23 @@ class Console:
             return
 
         if text_lower_split[0] == "time":
-            self.universe.set_time_factor(text_lower_split[1])
+            if len(text_lower_split) == 1:
+                print(f"Time factor {self.universe.time_factor}, age {self.universe.age}s")
+            elif text_lower_split[1] == "goto" and len(text_lower_split) > 2:
+                self.universe.set_age(text_lower_split[2])
+            else:
+                self.universe.set_time_factor(text_lower_split[1])
             return
 
-        for celestial in self.universe.celestial_bodies:
-            if str(celestial.uuid).lower() == text_lower or \
-                    str(celestial).lower() == text_lower:
-                celestial_type = type(celestial)
-                print(celestial_type)
-                self.universe.camera.set_locked_celestial(celestial)
-                return
+        if text_lower_split[0] == "unlock":
+            self.universe.camera.clear_locked_celestial()
+            return
+
+        celestial = self.universe.find_celestial(text)
+        if celestial:
+            print(type(celestial))
+            self.universe.camera.set_locked_celestial(celestial)
+            return
 
         if len(text_lower_split) == 1:
             return
@@ -42,6 +59,77 @@ class Console:
 
             locked_celestial.set_name(" ".join(text.split()[1:]))
 
+        elif text_lower_split[0] == "lock":
+            celestial = self.universe.find_celestial(text.split(maxsplit=1)[1])
+            if not celestial:
+                print(f"No cel body {text.split(maxsplit=1)[1]}")
+                return
+
+            self.universe.camera.set_locked_celestial(celestial)
+        elif text_lower_split[0] == "spawn":  # spawn <n_stars> [n_planets]
+            try:
+                n_stars, n_planets = (int(arg) for arg in (text_lower_split[1:] + ["10"])[:2])
+            except ValueError as ex:
+                print(ex)
+                return
+
+            for i in range(n_stars):
+                self.universe.add_star(n_planets)
+            print(f"Spawned {n_stars} stars, {len(self.universe.celestial_bodies)} cel bodies")
+        elif text_lower_split[0] == "query":
+            self.query(text.split(maxsplit=1)[1])
+        elif text_lower_split[0] == "run":
+            self.run_file(text.split()[1])
+        elif text_lower_split[0] == "save" and text_lower_split[1] == "template":
+            if len(text_lower_split) > 2:
+                self.universe.save_as_template(text.split()[2])
+            else:
+                print("save template <path>")
+        elif text_lower_split[0] == "save":  # paths keep their case
+            self.universe.save(text.split()[1], include_traces="traces" in text_lower_split[2:])
+        elif text_lower_split[0] == "load":
+            self.universe.load(text.split()[1])
+        elif text_lower_split[0] == "record":
+            if text_lower_split[1] == "stop":
+                self.universe.stop_recording()
+            else:
+                self.universe.start_recording(text.split()[1])
+        elif text_lower_split[0] == "template":
+            self.universe.create_from_template(text.split()[1])
+
+    def query(self, text):  # a cel body, or how many there are of a type
+        celestial_type = QUERY_TYPES.get(text.lower())
+        if celestial_type:
+            print(f"{text}: {len(self.universe.celestials_by_type.get(celestial_type, {}))}")
+            return
+
+        celestial = self.universe.find_celestial(text)
+        if not celestial:
+            print(f"No cel body {text}")
+            return
+
+        print(f"{celestial}: uuid={celestial.uuid}, type={type(celestial).__name__}, host={celestial.host}, "
+              f"guests={len(celestial.guests)}, center={celestial.get_abs_center()}")
+
+    def run_script(self, lines):  # one command per line, lines starting with # are comments
+        for line in lines:
+            if line.strip() and not line.lstrip().startswith("#"):
+                try:
+                    self.execute(line)
+                except Exception as ex:  # one bad line doesn't stop the rest of the script
+                    print(f"Failed \"{line.strip()}\": {ex!r}")
+
+    def run_file(self, path):  # - is stdin
+        if path == "-":
+            self.run_script(sys.stdin)
+            return
+
+        try:
+            with open(path) as f:
+                self.run_script(f)
+        except OSError as ex:
+            print(f"Could not run {path}: {ex}")
+
     def add_text(self, text):
         self.input_text += text
 
@@ -62,6 +150,6 @@ class Console:
         if not self.active:
             return
 
-        surf = self.universe.font.render(self.leading_text + self.input_text,
-                                         True, self.text_color)
-        self.universe.screen.blit(surf, self.position)
+        surf = self.universe.render.text_cache.render(self.leading_text + self.input_text,
+                                                      self.text_color)
+        return self.universe.screen.blit(surf, self.position)
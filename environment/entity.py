@@ -2,43 +2,35 @@ from globals import *
 
 
 class Entity:
-    def __init__(self, universe, environment, abs_pos, color):
+    def __init__(self, universe, environment, abs_pos, color, collides=True):
         self.universe = universe
         self.environment = environment
-        self.abs_pos = abs_pos
         self.color = color
 
-        self.y_vel = 0
-        self.on_ground = False
         self.w, self.h = 20, 20
-        self.surf = pg.Surface((self.w, self.h))
-        self.surf.fill(self.color)
-        self.rect: pg.Rect = self.surf.get_rect()
+        self.img = self.environment.get_tile(self.color, (self.w, self.h))  # shared by all entities alike
+
+        # position and velocity live in the entity engine, which ticks all entities at once
+        self.index = self.environment.entity_engine.add(abs_pos, self.w, self.h, collides)
         self.environment.entities.append(self)
 
-    def draw(self):
-        abs_pos_offsetted = self.abs_pos[0] - self.w / 2, \
-                            self.abs_pos[1] - self.h / 2
-        self.universe.screen.blit(self.surf,
-                                  self.universe.camera.calculate_pos_on_screen(
-                                      abs_pos_offsetted))
-
-    def tick(self, dt):
-        self.y_vel += self.environment.celestial_body.gravity
-        self.abs_pos = self.abs_pos[0], self.abs_pos[1] + self.y_vel * dt
-        if self.abs_pos[1] + self.h / 2 >= self.environment.ground_y:
-            self.on_ground = True
-            self.abs_pos = self.abs_pos[0], self.environment.ground_y - self.h / 2
-            self.y_vel = 0
-
-        else:
-            self.on_ground = False
-
-        self.check_collisions()
-
-    def check_collisions(self):  # todo broken asf
-        for entity in self.environment.entities:
-            if self.abs_pos[0] <= entity.abs_pos[0] + 10:
-                self.abs_pos = entity.abs_pos[0] + 30, self.abs_pos[1]
-            elif self.abs_pos[0] + 10 >= entity.abs_pos[0]:
-                self.abs_pos = entity.abs_pos[0] - 20, self.abs_pos[1]
+    @property
+    def abs_pos(self):
+        entity_engine = self.environment.entity_engine
+        return float(entity_engine.x[self.index]), float(entity_engine.y[self.index])
+
+    @abs_pos.setter
+    def abs_pos(self, value):
+        self.environment.entity_engine.set_pos(self.index, value)
+
+    @property
+    def y_vel(self):
+        return float(self.environment.entity_engine.y_vel[self.index])
+
+    @y_vel.setter
+    def y_vel(self, value):
+        self.environment.entity_engine.set_y_vel(self.index, value)
+
+    @property
+    def on_ground(self):  # or on top of another entity
+        return bool(self.environment.entity_engine.on_ground[self.index])
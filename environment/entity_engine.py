@@ -0,0 +1,176 @@
+from globals import *
+
+CONTACT_TOLERANCE = 1e-6  # boxes closer than this touch
+
+
+# positions and velocities of all entities of the environment as contiguous arrays,
+# index i belongs to environment.entities[i]. positions are the centers of the boxes
+class EntityEngine:
+    columns = "x", "y", "y_vel", "w", "h", "on_ground", "collides", "supported"
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.y_vel = np.zeros(capacity)
+        self.w = np.zeros(capacity)
+        self.h = np.zeros(capacity)
+        self.on_ground = np.zeros(capacity, dtype=bool)
+        self.collides = np.zeros(capacity, dtype=bool)  # the player walks through items
+        self.supported = np.zeros(capacity, dtype=bool)  # resting on the ground or another entity
+        self.awake = False  # colliding entities moved, when they all rest there's nothing to check
+
+    def add(self, abs_pos, w, h, collides):
+        if self.n == self.capacity:
+            self.grow()
+
+        index = self.n
+        self.x[index], self.y[index] = abs_pos
+        self.y_vel[index] = 0
+        self.w[index], self.h[index] = w, h
+        self.on_ground[index] = False
+        self.collides[index] = collides
+        self.supported[index] = False
+        self.n += 1
+        self.awake = True
+        return index
+
+    def set_pos(self, index, abs_pos):
+        self.x[index], self.y[index] = abs_pos
+        self.awake |= bool(self.collides[index])
+
+    def set_y_vel(self, index, y_vel):
+        self.y_vel[index] = y_vel
+        self.awake |= bool(self.collides[index])
+
+    def grow(self):
+        self.capacity *= 2
+        for column in self.columns:
+            setattr(self, column, np.resize(getattr(self, column), self.capacity))
+
+    def clear(self):
+        self.n = 0
+
+    def get_free_pos(self, index, abs_pos):  # for entity index, on top of the pile if anything is in the way
+        x, y = abs_pos
+        n = self.n
+        w, h = self.w[index], self.h[index]
+        others = self.collides[:n] & (np.arange(n) != index) & \
+            ((self.w[:n] + w) / 2 - np.abs(self.x[:n] - x) > CONTACT_TOLERANCE)
+        tops = self.y[:n][others] - self.h[:n][others] / 2
+        bottoms = self.y[:n][others] + self.h[:n][others] / 2
+        higher = tops < y + h / 2 - CONTACT_TOLERANCE  # at the same height or higher up
+        if not (higher & (bottoms > y - h / 2 + CONTACT_TOLERANCE)).any():
+            return x, y
+
+        return x, tops[higher].min() - h / 2
+
+    def tick(self, dt, gravity, ground_y):
+        n = self.n
+        y, y_vel, h = self.y[:n], self.y_vel[:n], self.h[:n]
+        collides = self.collides[:n]
+        if self.awake:
+            a, b = self.get_candidate_pairs()
+            self.supported[:n] = self.get_supported(a, b, ground_y)
+        else:  # only the entities that don't collide can have moved
+            self.supported[:n] = np.where(collides, self.supported[:n], y + h / 2 >= ground_y - CONTACT_TOLERANCE)
+
+        # resting entities don't fall, otherwise stacks would sink a bit every tick
+        supported = self.supported[:n]
+        y_vel[~supported] += gravity
+        y_vel[supported] = np.minimum(y_vel[supported], 0)  # jumping is still possible
+        y += y_vel * dt
+
+        on_ground = y + h / 2 >= ground_y
+        y[on_ground] = ground_y - h[on_ground] / 2
+        y_vel[on_ground] = 0
+        self.on_ground[:n] = on_ground | (supported & collides)
+        if not self.awake:
+            return
+
+        # the pairs stay the same, entities move less than a cell per tick
+        collided = False
+        for _ in range(ENTITY_COLLISION_ITERATIONS):
+            if not self.resolve_collisions(a, b):
+                break
+            collided = True
+
+        self.awake = collided or not (supported[collides].all() and not y_vel[collides].any())
+
+    def get_supported(self, a, b, ground_y):  # on the ground or on top of another entity
+        x, y, w, h = self.x, self.y, self.w, self.h
+        supported = self.y[:self.n] + self.h[:self.n] / 2 >= ground_y - CONTACT_TOLERANCE
+        upper = np.where(y[a] <= y[b], a, b)
+        lower = np.where(y[a] <= y[b], b, a)
+        gap = (y[lower] - h[lower] / 2) - (y[upper] + h[upper] / 2)
+        resting = (np.abs(gap) <= CONTACT_TOLERANCE) & \
+                  ((w[a] + w[b]) / 2 - np.abs(x[a] - x[b]) > CONTACT_TOLERANCE)
+        supported[upper[resting]] = True
+        return supported
+
+    def get_candidate_pairs(self):
+        # uniform grid broad phase, boxes are at most one cell big, so only boxes in the
+        # same or a neighbouring cell can overlap. half of the neighbours is enough
+        indices = np.flatnonzero(self.collides[:self.n])
+        if len(indices) < 2:
+            return indices[:0], indices[:0]
+
+        cell_size = max(self.w[indices].max(), self.h[indices].max())
+        cell_x = np.floor_divide(self.x[indices], cell_size).astype(np.int64)
+        cell_y = np.floor_divide(self.y[indices], cell_size).astype(np.int64)
+        keys = cell_x * 2 ** 32 + cell_y
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        positions = np.arange(len(keys))
+
+        firsts, seconds = [], []
+        for offset_x, offset_y in (0, 0), (0, 1), (1, -1), (1, 0), (1, 1):
+            neighbour_keys = keys + offset_x * 2 ** 32 + offset_y
+            ends = np.searchsorted(keys, neighbour_keys, side="right")
+            if offset_x or offset_y:
+                starts = np.searchsorted(keys, neighbour_keys, side="left")
+            else:  # only the boxes after this one in the same cell
+                starts = positions + 1
+
+            counts = np.maximum(ends - starts, 0)
+            first = np.repeat(positions, counts)
+            run_starts = np.repeat(np.cumsum(counts) - counts, counts)
+            firsts.append(first)
+            seconds.append(np.repeat(starts, counts) + np.arange(len(first)) - run_starts)
+
+        return indices[order[np.concatenate(firsts)]], indices[order[np.concatenate(seconds)]]
+
+    def resolve_collisions(self, a, b):  # whether any of the pairs overlapped
+        x, y, w, h = self.x, self.y, self.w, self.h
+        overlap_x = (w[a] + w[b]) / 2 - np.abs(x[a] - x[b])
+        overlap_y = (h[a] + h[b]) / 2 - np.abs(y[a] - y[b])
+        overlapping = (overlap_x > CONTACT_TOLERANCE) & (overlap_y > CONTACT_TOLERANCE)
+        if not overlapping.any():
+            return False
+
+        a, b = a[overlapping], b[overlapping]
+        overlap_x, overlap_y = overlap_x[overlapping], overlap_y[overlapping]
+
+        # separate along the axis with the smaller overlap. vertically the upper box ends up
+        # standing on the lower one, horizontally both move away half of the overlap
+        vertical = overlap_y <= overlap_x
+        va, vb = a[vertical], b[vertical]
+        upper = np.where(y[va] <= y[vb], va, vb)
+        lower = np.where(y[va] <= y[vb], vb, va)
+        new_y = y[:self.n].copy()
+        np.minimum.at(new_y, upper, y[lower] - (h[lower] + h[upper]) / 2)
+        self.y_vel[upper] = np.minimum(self.y_vel[upper], 0)
+        self.on_ground[upper] = True
+
+        # averaged over the horizontal contacts of a box, summing them overshoots in crowds
+        ha, hb = a[~vertical], b[~vertical]
+        push = np.where(x[ha] < x[hb], -1, 1) * overlap_x[~vertical] / 2
+        shift_x = np.zeros(self.n)
+        np.add.at(shift_x, ha, push)
+        np.add.at(shift_x, hb, -push)
+        n_contacts = np.bincount(np.concatenate((ha, hb)), minlength=self.n)
+
+        self.x[:self.n] += shift_x / np.maximum(n_contacts, 1)
+        self.y[:self.n] = new_y
+        return True
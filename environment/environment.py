@@ -1,4 +1,5 @@
 from globals import *
+from .entity_engine import EntityEngine
 from .player import Player
 from .item import Item
 
@@ -9,15 +10,25 @@ class Environment:
         self.celestial_body = None
         self.ground_y = 100
         self.player = None
-        self.entities = []
+        self.entities = []  # the player first, then the dropped items
+        self.entity_engine = EntityEngine()
+        self.n_dropped_items = 0
+        self.tiles = {}  # (color, size): filled surface
 
     def enter_celestial(self, celestial):
+        self.clear_entities()
         self.celestial_body = celestial
         self.player = Player(self.universe, self)
 
     def leave_celestial(self):
         self.celestial_body = None
         self.player = None
+        self.clear_entities()
+
+    def clear_entities(self):
+        self.entities = []
+        self.entity_engine.clear()
+        self.n_dropped_items = 0
 
     def draw(self):
         self.draw_sky()
@@ -25,27 +36,54 @@ class Environment:
         self.draw_entities()
 
     def draw_sky(self):
-        print(self, "implement")  # todo implement
+        pass  # todo implement, the background of space shows for now
+
+    def draw_entities(self):  # only the ones on screen, in one batch
+        entity_engine = self.entity_engine
+        n = entity_engine.n
+        left, top = self.universe.camera.calculate_pos_on_screen((0, 0))  # environments are never zoomed
+        x = np.round(entity_engine.x[:n] - entity_engine.w[:n] / 2 + left).astype(np.int64)
+        y = np.round(entity_engine.y[:n] - entity_engine.h[:n] / 2 + top).astype(np.int64)
+        on_screen = np.flatnonzero((x < SCREEN_WIDTH) & (x + entity_engine.w[:n] > 0) &
+                                   (y < SCREEN_HEIGHT) & (y + entity_engine.h[:n] > 0))
+
+        # the player's image is bigger than its box
+        on_screen = on_screen[on_screen > 0]
+        player_pos = self.universe.camera.calculate_pos_on_screen(
+            (self.player.abs_pos[0] - self.player.w / 2, self.player.abs_pos[1] - self.player.h / 2))
 
-    def draw_entities(self):
-        for entity in self.entities:
-            entity.draw()
+        self.universe.screen.blits([(self.player.img, player_pos)] +
+                                   [(self.entities[i].img, (int(x[i]), int(y[i]))) for i in on_screen.tolist()],
+                                   False)
 
     def draw_ground(self):
-        ground_on_screen = self.universe.camera.calculate_pos_on_screen((0, 100))[1]
+        ground_on_screen = self.universe.camera.calculate_pos_on_screen((0, self.ground_y))[1]
         if ground_on_screen >= SCREEN_HEIGHT:
             return
 
-        ground_draw_height = SCREEN_HEIGHT - ground_on_screen
-        surf = pg.Surface((SCREEN_WIDTH, ground_draw_height))
-        surf.fill(self.celestial_body.color)
-        self.universe.screen.blit(surf, (0, ground_on_screen))
+        self.universe.screen.fill(self.celestial_body.color,
+                                  (0, max(ground_on_screen, 0), SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    def get_tile(self, color, size):
+        if (color, size) not in self.tiles:
+            tile = pg.Surface(size)
+            tile.fill(color)
+            self.tiles[color, size] = tile
+
+        return self.tiles[color, size]
 
     def tick(self, dt):
         if self.celestial_body:
-            for item in self.entities:
-                item.tick(dt)
-            self.player.tick(dt)
+            self.entity_engine.tick(dt, self.celestial_body.gravity, self.ground_y)
 
     def add_item(self, abs_pos):
-        self.entities.append(Item(self.universe, self, abs_pos, self.celestial_body.color))
+        if self.n_dropped_items >= MAX_ENVIRONMENT_ITEMS:  # the oldest item is dropped again instead
+            item = self.entities[1 + self.n_dropped_items % MAX_ENVIRONMENT_ITEMS]
+            item.y_vel = 0
+        else:
+            item = Item(self.universe, self, abs_pos, self.celestial_body.color)
+
+        # dropping into other items would take many ticks to untangle
+        item.abs_pos = self.entity_engine.get_free_pos(item.index, abs_pos)
+
+        self.n_dropped_items += 1
@@ -1,75 +1,126 @@
+from collections import deque
+
 from globals import *
 
+MOVEMENT_KEYS = pg.K_LEFT, pg.K_RIGHT, pg.K_a, pg.K_d, pg.K_w
+
+
+# drains the pygame events once per frame. everything that only changes the view or the ui
+# happens right away, key presses that act on the simulation are queued with the time they
+# were drained and consumed by the fixed simulation steps they belong to, so the player
+# moves the same no matter the frame rate and short key presses are never lost
+class InputHandler:
+    def __init__(self, universe):
+        self.universe = universe
+        self.events = deque()  # (time, event) not consumed by the simulation yet
+        self.held_keys = set()  # as seen by the simulation, lags the keyboard by up to a step
+
+    def poll(self, dt):
+        now = time.perf_counter()
+        for ev in pg.event.get():
+            if ev.type == pg.QUIT:
+                raise InterruptedError
+
+            elif ev.type == pg.KEYDOWN:
+                if not self.handle_key(ev):
+                    self.events.append((now, ev))
 
-def handle_events_and_input(universe):
-    camera = universe.camera
-    console = universe.console
-    environment = universe.environment
-    render = universe.render
+            elif ev.type == pg.KEYUP:  # even with the console open, keys held before must be released
+                self.events.append((now, ev))
 
-    for ev in pg.event.get():
-        if ev.type == pg.QUIT:
+            elif ev.type == pg.MOUSEBUTTONDOWN:
+                self.handle_mouse_button(ev)
+
+        self.handle_pressed_keys(dt)
+
+    def handle_key(self, ev):  # whether the key press was used up by the ui
+        universe = self.universe
+        camera = universe.camera
+        console = universe.console
+        environment = universe.environment
+        render = universe.render
+
+        if ev.key == pg.K_RETURN:
+            console.toggle()
+        elif console.active:
+            if ev.key == pg.K_BACKSPACE:
+                console.remove_last_character()
+
+            else:
+                console.add_text(ev.unicode)
+
+        elif ev.key == pg.K_e:
+            if not environment.celestial_body and camera.locked_celestial:
+                environment.enter_celestial(camera.locked_celestial)
+            else:
+                environment.leave_celestial()
+        elif ev.key == pg.K_F1:
+            render.show_debug = not render.show_debug
+        elif ev.key == pg.K_o:
+            render.show_orbits = not render.show_orbits
+        elif ev.key == pg.K_q:
             raise InterruptedError
+        elif ev.key == pg.K_r:
+            universe.reset()
+            universe.camera.clear_locked_celestial()
+        elif ev.key == pg.K_SPACE:
+            universe.paused = not universe.paused
+        else:
+            return False
 
-        elif ev.type == pg.KEYDOWN:  # ACTIVE KEY PRESSES
-            if ev.key == pg.K_RETURN:
-                console.toggle()
-            elif console.active:
-                if ev.key == pg.K_BACKSPACE:
-                    console.remove_last_character()
+        return True
 
-                else:
-                    console.add_text(ev.unicode)
+    def handle_mouse_button(self, ev):
+        universe = self.universe
+        camera = universe.camera
+        if ev.button == 1:
+            celestial = universe.get_hovered_object()
+            if celestial:
+                camera.set_locked_celestial(celestial)
 
-                continue
+        elif ev.button == 4 and camera.zoom_factor < CAMERA_ZOOM_FACTOR_MAX:
+            camera.zoom_factor *= 2
+        elif ev.button == 5 and camera.zoom_factor > CAMERA_ZOOM_FACTOR_MIN:
+            camera.zoom_factor *= 0.5
 
-            locked_celestial = camera.locked_celestial
-            if ev.key == pg.K_e:
-                if not environment.celestial_body and locked_celestial:
-                    environment.enter_celestial(locked_celestial)
-                else:
-                    environment.leave_celestial()
-            elif ev.key == pg.K_f and environment.celestial_body:
-                environment.player.drop_item()
-            elif ev.key == pg.K_F1:
-                render.show_debug = not render.show_debug
-            elif ev.key == pg.K_o:
-                render.show_orbits = not render.show_orbits
-            elif ev.key == pg.K_q:
-                raise InterruptedError
-            elif ev.key == pg.K_r:
-                universe.reset()
-                universe.camera.clear_locked_celestial()
-            elif ev.key == pg.K_SPACE:
-                universe.paused = not universe.paused
-
-        elif ev.type == pg.MOUSEBUTTONDOWN:
-            if ev.button == 1:
-                celestial = universe.get_hovered_object()
-                if celestial:
-                    camera.set_locked_celestial(celestial)
-
-            elif ev.button == 4 and camera.zoom_factor <= CAMERA_ZOOM_FACTOR_MAX:
-                camera.zoom_factor *= 2
-            elif ev.button == 5 and camera.zoom_factor >= CAMERA_ZOOM_FACTOR_MIN:
-                camera.zoom_factor *= 0.5
-
-    pressed_keys = pg.key.get_pressed()
-    if not console.active:  # PASSIVE KEY PRESSES
+    def handle_pressed_keys(self, dt):  # once per frame with the real dt
+        universe = self.universe
+        if universe.console.active:
+            return
+
+        pressed_keys = pg.key.get_pressed()
         if pressed_keys[pg.K_EQUALS] and universe.time_factor <= TIME_FACTOR_MAX:
             universe.time_factor += TIME_FACTOR_STEP
         if pressed_keys[pg.K_MINUS] and universe.time_factor >= TIME_FACTOR_MIN:
             universe.time_factor -= TIME_FACTOR_STEP
 
-        if environment.celestial_body and not universe.paused:
-            environment.player.move((pressed_keys[pg.K_RIGHT] or pressed_keys[pg.K_d]) -
-                                    (pressed_keys[pg.K_LEFT] or pressed_keys[pg.K_a]))
-            if pressed_keys[pg.K_w]:
-                environment.player.jump()
+        if not universe.environment.celestial_body:
+            universe.camera.move_center((pressed_keys[pg.K_RIGHT] or pressed_keys[pg.K_d]) -
+                                        (pressed_keys[pg.K_LEFT] or pressed_keys[pg.K_a]),
+                                        (pressed_keys[pg.K_DOWN] or pressed_keys[pg.K_s]) -
+                                        (pressed_keys[pg.K_UP] or pressed_keys[pg.K_w]), dt)
 
-        else:
-            camera.move_center((pressed_keys[pg.K_RIGHT] or pressed_keys[pg.K_d]) -
-                               (pressed_keys[pg.K_LEFT]
-                                or pressed_keys[pg.K_a]),
-                               (pressed_keys[pg.K_DOWN] or pressed_keys[pg.K_s]) -
-                               (pressed_keys[pg.K_UP] or pressed_keys[pg.K_w]))
+    def consume(self, until):  # the queued events up to this time
+        environment = self.universe.environment
+        while self.events and self.events[0][0] <= until:
+            _, ev = self.events.popleft()
+            if ev.type == pg.KEYUP:
+                self.held_keys.discard(ev.key)
+                continue
+
+            if ev.key in MOVEMENT_KEYS:
+                self.held_keys.add(ev.key)
+            elif ev.key == pg.K_f and environment.celestial_body:
+                environment.player.drop_item()
+
+    def step(self, until):  # before every simulation step, with the time the step ends at
+        self.consume(until)
+        environment = self.universe.environment
+        if not environment.celestial_body:
+            return
+
+        held_keys = self.held_keys
+        environment.player.move((pg.K_RIGHT in held_keys or pg.K_d in held_keys) -
+                                (pg.K_LEFT in held_keys or pg.K_a in held_keys))
+        if pg.K_w in held_keys:
+            environment.player.jump()
@@ -0,0 +1,107 @@
+from globals import *
+from random_stream import RandomStream
+from space.star import Star
+
+
+# unbounded procedural galaxy. space is divided into cells that each hold at most one
+# star system, which is fully determined by the seed and the cell. only the cells
+# around the camera are generated, systems further away are evicted and generated
+# again from their seed once the camera comes back
+class Galaxy:
+    cell_size = GALAXY_CELL_SIZE
+
+    def __init__(self, universe, seed=GALAXY_SEED):
+        self.universe = universe
+        self.seed = seed
+        self.enabled = False
+        self.cells = {}  # (cell_x, cell_y): star, or None for an empty cell
+        self.cell_range = None  # cells loaded by the last update, first_x, first_y, last_x, last_y
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+
+        self.clear()
+        self.enabled = True
+        self.update()
+
+    def clear(self):  # the bodies themselves are cleared by the universe
+        self.cells.clear()
+        self.cell_range = None
+        self.enabled = False
+
+    def update(self):
+        if not self.enabled or self.universe.environment.celestial_body:
+            return
+
+        # the cells only change once the camera crosses a cell border or zooms
+        cell_range = self.get_cell_range(GALAXY_LOAD_MARGIN)
+        if cell_range == self.cell_range:
+            return
+
+        self.cell_range = cell_range
+        self.unload(self.get_cell_range(GALAXY_UNLOAD_MARGIN))
+
+        first_x, first_y, last_x, last_y = cell_range
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                if (cell_x, cell_y) not in self.cells:
+                    self.cells[cell_x, cell_y] = self.generate(cell_x, cell_y)
+
+    def get_cell_range(self, margin):
+        camera = self.universe.camera
+        left, top, right, bottom = camera.get_abs_screen_rect()
+        center_x, center_y = (math.floor(pos / self.cell_size) for pos in camera.center_pos)
+        return max(math.floor(left / self.cell_size) - margin, center_x - GALAXY_MAX_LOAD_RADIUS), \
+            max(math.floor(top / self.cell_size) - margin, center_y - GALAXY_MAX_LOAD_RADIUS), \
+            min(math.floor(right / self.cell_size) + margin, center_x + GALAXY_MAX_LOAD_RADIUS), \
+            min(math.floor(bottom / self.cell_size) + margin, center_y + GALAXY_MAX_LOAD_RADIUS)
+
+    def unload(self, cell_range):
+        first_x, first_y, last_x, last_y = cell_range
+
+        # never evict the system the camera is locked to or the player is on
+        kept_stars = []
+        for celestial in (self.universe.camera.locked_celestial, self.universe.environment.celestial_body):
+            while celestial is not None and celestial.host is not None:
+                celestial = celestial.host
+            if celestial is not None:
+                kept_stars.append(celestial)
+
+        celestials = []
+        for cell in list(self.cells):
+            star = self.cells[cell]
+            if first_x <= cell[0] <= last_x and first_y <= cell[1] <= last_y or star in kept_stars:
+                continue
+
+            del self.cells[cell]
+            if star:
+                celestials.append(star)
+                celestials.extend(star.get_guests(recursive=True))
+
+        # one batched removal instead of compacting the arrays for every system
+        if celestials:
+            self.universe.remove_celestials(celestials)
+
+    def generate(self, cell_x, cell_y):
+        # seeds are non-negative, interleave the negative cells with the positive ones
+        rng = RandomStream([self.seed, *(2 * cell if cell >= 0 else -2 * cell - 1 for cell in (cell_x, cell_y))])
+        if rng.random() >= GALAXY_STAR_DENSITY:
+            return None
+
+        # somewhere in the middle half of the cell, so systems of neighbouring cells don't overlap
+        abs_center = (cell_x + 0.25 + rng.random() / 2) * self.cell_size, \
+            (cell_y + 0.25 + rng.random() / 2) * self.cell_size
+        n_planets = rng.randint(0, GALAXY_MAX_PLANETS)
+
+        # the bodies draw from the universe's stream, use the one of the cell for just this system
+        orbit_engine = self.universe.orbit_engine
+        first_index = orbit_engine.n
+        universe_rng, self.universe.rng = self.universe.rng, rng
+        star = Star(self.universe, abs_center, n_planets=n_planets, name=f"Star@{cell_x},{cell_y}")
+        self.universe.rng = universe_rng
+
+        # the drawn angles are the angles at time 0, so a system looks the same no matter
+        # when it was generated
+        orbit_engine.rebase_epochs(first_index, orbit_engine.n)
+        return star
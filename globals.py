@@ -1,5 +1,7 @@
+import logging
 import random
 import os
+import time
 import math
 import numpy as np
 import pygame as pg
@@ -8,10 +10,20 @@ import pygame as pg
 # settings
 SCREEN_WIDTH, SCREEN_HEIGHT = 1280, 720
 MAX_FPS = 120
+SIMULATION_DT = 1 / 120  # fixed simulation timestep in seconds, independent of the frame rate
+MAX_SIMULATION_STEPS = 10  # per frame, the simulation slows down instead of lagging further behind
 ASSETS_FOLDER = "assets"
+FONT_NAME, FONT_SIZE = "Comic Sans MS", 20
+LOG_LEVEL = logging.INFO  # logging.DEBUG also logs every created cel body
+STARTUP_TIME_TARGET = 1  # seconds from launch until the first frame or tick, slower startups are logged
 TRACE_POINT_MAX_AGE = 1
 MAX_TRACE_POINTS = 100  # per celestial object
+TRAIL_ALPHA_BANDS = 32  # trails are drawn as one polyline per alpha band
 N_BACKGROUND_STARS = 10
+BACKGROUND_STAR_ALPHA_LEVELS = 16  # pre-tinted copies of every background star frame
+VECTORIZED_ORBITS = True  # update all orbits in one batched numpy step per tick
+ANALYTIC_ORBITS = True  # angles are a function of the universe age, no drift and instant time jumps
+SHARD_PROCESSES = 0  # evaluate the orbits of the star systems on this many processes, 0 = in this process
 
 DEFAULT_TIME_FACTOR = 0.1
 TIME_FACTOR_STEP = 0.01
@@ -19,18 +31,46 @@ TIME_FACTOR_MAX = 5
 TIME_FACTOR_MIN = 0.01
 
 CAMERA_ZOOM_FACTOR_MAX = 8
-CAMERA_ZOOM_FACTOR_MIN = 0.5
-CAMERA_MOVEMENT_STEP = 20  # todo should account for deltatime
+CAMERA_ZOOM_FACTOR_MIN = 1 / 1024
+CAMERA_MOVEMENT_SPEED = 2400  # screen pixels per second
+
+LOD_MIN_ORBIT_PIXELS = 3  # guests closer than this to their host on screen are drawn as part of it
+LOD_POINT_ZOOM = 0.05  # below this zoom, star systems are drawn as single points
+
+MAX_ENVIRONMENT_ITEMS = 5000  # dropping more items picks up the oldest ones again
+ENTITY_COLLISION_ITERATIONS = 4  # per tick, more lets stacks of items settle faster
+
+UNIVERSE_SEED = None  # same seed, same universe. None = a different one on every reset
+RANDOM_BLOCK_SIZE = 1024  # random numbers drawn at once
+
+PROCEDURAL_GALAXY = False  # generate star systems around the camera instead of a line of stars
+GALAXY_SEED = 0
+GALAXY_CELL_SIZE = 4000  # at most one star system per cell
+GALAXY_STAR_DENSITY = 0.5  # chance of a cell having a star system
+GALAXY_MAX_PLANETS = 10
+GALAXY_LOAD_MARGIN = 1  # cells around the screen that are generated
+GALAXY_UNLOAD_MARGIN = 2  # cells around the screen before a system is evicted again
+GALAXY_MAX_LOAD_RADIUS = 8  # cells from the camera center, bounds memory when zoomed out
+
+DIRTY_RECTS = True  # only repaint and flip the parts of the screen that changed
+DIRTY_RECTS_MAX_AREA = 0.5  # of the screen, above this a full update is cheaper
 
 SHOW_DEBUG = True
+TEXT_CACHE_SIZE = 256  # rendered labels kept around
+PROFILER_WINDOW = 240  # frames used for the percentiles in the debug overlay
+PROFILER_EXPORT_PATH = None  # e.g. "profile.csv" or "profile.json", written on exit
 SHOW_CELESTIAL_BODY_LABEL = False
 SHOW_GUEST_ORBITS = False
 
 
-# assets
-IMGS_BACKGROUND_STAR = [pg.image.load(os.path.join(ASSETS_FOLDER, f"bg_star_{i}.png"))
-                        for i in range(7)]
-IMG_PLAYER = pg.image.load(os.path.join(ASSETS_FOLDER, "astronaut.png"))
+# logging
+logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+log = logging.getLogger("space")
+
+
+# assets, loaded on first use so importing stays cheap
+N_IMGS_BACKGROUND_STAR = 7
+loaded_imgs = {}
 
 
 # colors
@@ -79,17 +119,39 @@ SCREEN_CENTER = SCREEN_WIDTH_HALF, SCREEN_HEIGHT_HALF
 
 
 # general functions
-def get_random_dist(host, base, variance):
-    return random.uniform(base * (len(host.guests) - variance + 1),
-                          base * (len(host.guests) + variance + 1))
+def load_img(file_name):
+    if file_name not in loaded_imgs:
+        loaded_imgs[file_name] = pg.image.load(os.path.join(ASSETS_FOLDER, file_name))
+
+    return loaded_imgs[file_name]
+
+
+def log_startup_time(start_time, name):
+    startup_time = time.perf_counter() - start_time
+    log.info(f"{name} startup took {round(startup_time * 1000)}ms")
+    if startup_time > STARTUP_TIME_TARGET:
+        log.warning(f"{name} startup is slower than the target of {STARTUP_TIME_TARGET}s")
+
+
+def non_negative_int(text):  # argparse type of seeds, numpy only takes these
+    value = int(text)
+    if value < 0:
+        raise ValueError(f"{value} is negative")
+
+    return value
+
+
+def get_random_dist(rng, host, base, variance):
+    return rng.uniform(base * (len(host.guests) - variance + 1),
+                       base * (len(host.guests) + variance + 1))
 
 
-def get_random_radius(base, variance):
-    return random.uniform(base * (1 - variance), base * (1 + variance))
+def get_random_radius(rng, base, variance):
+    return rng.uniform(base * (1 - variance), base * (1 + variance))
 
 
-def get_random_color():
-    return random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)
+def get_random_color(rng):
+    return rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)
 
 
 # numpy shortcuts
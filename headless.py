@@ -0,0 +1,57 @@
+import argparse
+import time
+
+start_time = time.perf_counter()  # before the imports, they are part of the startup
+
+from globals import *
+from universe import Universe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the simulation without a display")
+    parser.add_argument("--stars", type=int, default=1)
+    parser.add_argument("--planets", type=int, default=10, help="planets per star")
+    parser.add_argument("--ticks", type=int, default=0, help="stop after this many ticks, 0 = run forever")
+    parser.add_argument("--seed", type=non_negative_int, help="same seed, same universe, default is a random one")
+    parser.add_argument("--dt", type=float, default=SIMULATION_DT, help="fixed timestep in seconds")
+    parser.add_argument("--report-interval", type=float, default=1, help="seconds between reports")
+    parser.add_argument("--record", help="record the positions of all bodies to this file")
+    parser.add_argument("--script", help="console commands to run before simulating, - for stdin")
+    parser.add_argument("--processes", type=int, default=SHARD_PROCESSES,
+                        help="evaluate the star systems on this many processes, 0 = in this process")
+    args = parser.parse_args()
+
+    universe = Universe(headless=True, generate=False)
+    universe.reset(args.stars, args.planets, args.seed)
+    if args.script:
+        universe.console.run_file(args.script)
+    print(f"Headless: {len(universe.celestial_bodies)} cel bodies, dt={args.dt}s")
+    log_startup_time(start_time, "Headless")
+    if args.record:
+        universe.start_recording(args.record)
+    universe.start_sharding(args.processes)
+
+    start = last_report = time.perf_counter()
+    last_report_ticks = 0
+    try:
+        while not args.ticks or universe.n_ticks < args.ticks:
+            universe.tick(args.dt)  # as fast as possible
+
+            now = time.perf_counter()
+            if now - last_report >= args.report_interval:
+                tps = (universe.n_ticks - last_report_ticks) / (now - last_report)
+                print(f"{universe.n_ticks} ticks, {round(tps)} ticks/s, age: {round(universe.age, 2)}s")
+                last_report, last_report_ticks = now, universe.n_ticks
+
+    except KeyboardInterrupt:
+        print("Exiting")
+
+    universe.stop_recording()
+    universe.stop_sharding()
+    elapsed = time.perf_counter() - start
+    print(f"{universe.n_ticks} ticks in {round(elapsed, 2)}s, "
+          f"{round(universe.n_ticks / elapsed)} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
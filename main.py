@@ -1,41 +1,107 @@
-from globals import *
-from universe import Universe
-from event_handler import handle_events_and_input
-
-# todo create seperate graphics rendering thread
-
-
-# pygame init
-# todo pg display flags https://stackoverflow.com/questions/29135147/what-do-hwsurface-and-doublebuf-do
-pg.display.set_caption("Space Sim")
-pg.font.init()
-print("Pygame init")
-
-
-def main():
-    clock = pg.time.Clock()
-    universe = Universe()
-
-    while True:
-        dt = clock.tick(MAX_FPS) / 1000.0
-
-        try:
-            handle_events_and_input(universe)
-        except InterruptedError:
-            print("Exiting")
-            break
-
-        if not universe.paused:
-            universe.render.last_dt = dt
-            universe.tick(dt)
-
-        if universe.environment.celestial_body:
-            universe.camera.snap_to_player()
-        else:
-            universe.camera.snap_to_locked_celestial()
-
-        universe.render.draw_screen()
-
-
-if __name__ == "__main__":
-    main()
+import argparse
+import time
+
+start_time = time.perf_counter()  # before the imports, they are part of the startup
+
+from globals import *
+from recording import Replay
+from universe import Universe
+from event_handler import InputHandler
+
+# input and rendering stay on the window's thread, pygame only pumps events there. the
+# simulation is decoupled by its fixed timestep and the timestamped input queue instead
+
+
+# pygame init
+# todo pg display flags https://stackoverflow.com/questions/29135147/what-do-hwsurface-and-doublebuf-do
+pg.display.set_caption("Space Sim")
+pg.font.init()
+log.info("Pygame init")
+
+
+def main(replay_path=None, n_frames=0, script_path=None):
+    clock = pg.time.Clock()
+    universe = Universe()
+    profiler = universe.profiler
+    input_handler = InputHandler(universe)
+    accumulator = 0
+    frame = 0
+
+    if replay_path:
+        universe.replay = Replay(universe, replay_path)
+    else:
+        universe.start_sharding(SHARD_PROCESSES)
+
+    if script_path:
+        universe.console.run_file(script_path)
+
+    while True:
+        dt = clock.tick(MAX_FPS) / 1000.0
+
+        try:
+            with profiler.scope("input"):
+                input_handler.poll(dt)
+        except InterruptedError:
+            print("Exiting")
+            break
+
+        now = time.perf_counter()
+
+        if not universe.paused and universe.replay:
+            universe.render.last_dt = dt
+            with profiler.scope("tick"):
+                input_handler.consume(now)
+                universe.replay.tick(dt)
+
+        elif not universe.paused:
+            universe.render.last_dt = dt
+            accumulator += dt
+
+            # the simulation always steps with the same dt, no matter the frame rate.
+            # the steps of this frame catch up on the real time from now - accumulator to now
+            n_steps = 0
+            with profiler.scope("tick"):
+                while accumulator >= SIMULATION_DT and n_steps < MAX_SIMULATION_STEPS:
+                    input_handler.step(now - accumulator + SIMULATION_DT)
+                    universe.tick(SIMULATION_DT)
+                    accumulator -= SIMULATION_DT
+                    n_steps += 1
+
+            if n_steps == MAX_SIMULATION_STEPS:
+                accumulator = min(accumulator, SIMULATION_DT)
+
+            universe.orbit_engine.interpolation = accumulator / SIMULATION_DT
+
+        else:
+            input_handler.consume(now)
+
+        if universe.environment.celestial_body:
+            universe.camera.snap_to_player()
+        else:
+            universe.camera.snap_to_locked_celestial()
+
+        universe.galaxy.update()
+
+        universe.render.draw_screen()
+        profiler.end_frame()
+
+        frame += 1
+        if frame == 1:
+            log_startup_time(start_time, "Interactive")
+
+        if frame == n_frames:
+            break
+
+    universe.stop_recording()
+    universe.stop_sharding()
+    if PROFILER_EXPORT_PATH:
+        profiler.dump(PROFILER_EXPORT_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Space Sim")
+    parser.add_argument("--replay", help="play back a recording instead of simulating")
+    parser.add_argument("--frames", type=int, default=0, help="exit after this many frames, 0 = run until closed")
+    parser.add_argument("--script", help="console commands to run on startup, - for stdin")
+    args = parser.parse_args()
+    main(args.replay, args.frames, args.script)
@@ -0,0 +1,74 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from globals import *
+
+
+# named timing scopes per frame, with a rolling window for the debug overlay
+class Profiler:
+    def __init__(self, window=PROFILER_WINDOW, recording=False):
+        self.window = window
+        self.frame_times = deque(maxlen=window)
+        self.scope_times = {}  # name: deque of durations in seconds
+        self.current_frame = {}
+        self.frame_start = time.perf_counter()
+        self.recording = recording  # keep every frame for exporting
+        self.records = []
+
+    @contextmanager
+    def scope(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current_frame[name] = self.current_frame.get(name, 0) + time.perf_counter() - start
+
+    def end_frame(self):
+        now = time.perf_counter()
+        frame_time = now - self.frame_start
+        self.frame_start = now
+
+        self.frame_times.append(frame_time)
+        for name, duration in self.current_frame.items():
+            if name not in self.scope_times:
+                self.scope_times[name] = deque(maxlen=self.window)
+            self.scope_times[name].append(duration)
+
+        if self.recording:
+            self.records.append({"frame": frame_time, **self.current_frame})
+
+        self.current_frame = {}
+
+    @staticmethod
+    def get_percentiles_ms(times, percentiles=(50, 99)):
+        if not times:
+            return [0 for _ in percentiles]
+
+        return [float(value) * 1000 for value in np.percentile(times, percentiles)]
+
+    def get_summary(self):  # name: (p50, p99) in ms
+        summary = {"frame": self.get_percentiles_ms(self.frame_times)}
+        for name, times in self.scope_times.items():
+            summary[name] = self.get_percentiles_ms(times)
+
+        return summary
+
+    def dump(self, path):  # csv or json, depending on the extension
+        if path.endswith(".csv"):
+            field_names = ["frame"]
+            for record in self.records:
+                field_names.extend(name for name in record if name not in field_names)
+
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, field_names, restval=0)
+                writer.writeheader()
+                writer.writerows(self.records)
+
+        else:
+            with open(path, "w") as f:
+                json.dump({"summary_ms": self.get_summary(), "frames": self.records}, f)
+
+        print(f"Dumped {len(self.records)} profiled frames to {path}")
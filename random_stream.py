@@ -0,0 +1,24 @@
+from globals import *
+
+
+# seeded random numbers for generating the universe. drawing single numbers from a numpy
+# generator is slow, so they are drawn in blocks and handed out one by one. the same seed
+# always gives the same numbers in the same order, so the same universe
+class RandomStream:
+    def __init__(self, seed=None, block_size=RANDOM_BLOCK_SIZE):
+        self.seed = seed
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.block = []  # reversed, popping from the end is cheap
+
+    def random(self):  # [0, 1)
+        if not self.block:
+            self.block = self.generator.random(self.block_size)[::-1].tolist()
+
+        return self.block.pop()
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def randint(self, a, b):  # both inclusive, like random.randint
+        return a + int(self.random() * (b - a + 1))
@@ -0,0 +1,103 @@
+import os
+import struct
+
+from globals import *
+
+# .rec files: a fixed size header, then one fixed-stride record per tick
+HEADER_FORMAT = "<8sII"  # magic, version, n_bodies
+HEADER_SIZE = 64
+MAGIC = b"SPACEREC"
+VERSION = 1
+
+
+def get_record_dtype(n_bodies):
+    return np.dtype([("age", "<f8"), ("x", "<f4", (n_bodies,)), ("y", "<f4", (n_bodies,))])
+
+
+# appends the absolute centers of all bodies every tick, next to a snapshot
+# (path + ".npz") holding everything else about the bodies
+class Recorder:
+    def __init__(self, universe, path):
+        self.universe = universe
+        self.path = path
+        self.n_bodies = universe.orbit_engine.n
+        self.record = np.zeros(1, get_record_dtype(self.n_bodies))  # reused every tick
+        self.n_records = 0
+
+        universe.save(f"{path}.npz")
+        self.file = open(path, "wb")
+        self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.n_bodies).ljust(HEADER_SIZE, b"\0"))
+        print(f"Recording {self.n_bodies} cel bodies to {path}")
+
+    def tick(self):
+        orbit_engine = self.universe.orbit_engine
+        if orbit_engine.n != self.n_bodies:
+            print("Cel bodies changed, stopping the recording")
+            self.universe.stop_recording()
+            return
+
+        orbit_engine.update_positions()
+        self.record["age"] = self.universe.age
+        self.record["x"] = orbit_engine.abs_x[:self.n_bodies]
+        self.record["y"] = orbit_engine.abs_y[:self.n_bodies]
+        self.file.write(self.record.tobytes())
+        self.n_records += 1
+
+    def close(self):
+        self.file.close()
+        print(f"Recorded {self.n_records} ticks to {self.path}")
+
+
+# plays a recording back from a memory-mapped file, only the pages of the records
+# that are shown are ever read
+class Replay:
+    def __init__(self, universe, path):
+        self.universe = universe
+        universe.load(f"{path}.npz")
+
+        with open(path, "rb") as f:
+            magic, version, n_bodies = struct.unpack_from(HEADER_FORMAT, f.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+        if n_bodies != universe.orbit_engine.n:
+            raise ValueError(f"{path} has {n_bodies} cel bodies, its snapshot {universe.orbit_engine.n}")
+
+        dtype = get_record_dtype(n_bodies)
+        n_records = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+        self.records = np.memmap(path, dtype, "r", offset=HEADER_SIZE, shape=(n_records,))
+        self.ages = self.records["age"]
+        self.index = None
+        self.time = 0  # replay clock, runs continuously, the shown record is the last one before it
+        print(f"Replaying {n_records} ticks from {path}")
+
+        if n_records:
+            self.seek_age(float(self.ages[0]))
+
+    def tick(self, dt):
+        if not len(self.records):
+            return
+
+        self.time = min(self.time + dt * self.universe.time_factor, float(self.ages[-1]))
+        self.show(self.find(self.time))
+
+    def seek_age(self, age):
+        if not len(self.records):
+            return
+
+        self.time = min(max(age, float(self.ages[0])), float(self.ages[-1]))
+        self.show(self.find(self.time))
+        # the trails would connect both points in time, cleared once the new age is set
+        self.universe.trace_buffer.clear()
+
+    def find(self, age):  # binary search, so only a few pages are touched
+        return max(int(np.searchsorted(self.ages, age, "right")) - 1, 0)
+
+    def show(self, index):
+        if index == self.index or index < 0:
+            return
+
+        record = self.records[index]
+        self.index = index
+        self.universe.age = float(record["age"])
+        self.universe.orbit_engine.set_positions(record["x"], record["y"])
+        self.universe.trace_buffer.tick(self.universe.age)
@@ -2,34 +2,34 @@ from globals import *
 
 
 class BackgroundStar:
-    def __init__(self, universe):
+    def __init__(self, universe, rng):
         self.universe = universe
+        self.rng = rng  # of the render, the looks of the sky don't change the generated universe
 
-        self.frame = random.randint(0, 6)
-        self.default_ticks = random.randint(5, 15)
-        self.n_ticks = random.randint(0, self.default_ticks)
+        self.frame = rng.randint(0, N_IMGS_BACKGROUND_STAR - 1)
+        self.default_ticks = rng.randint(5, 15)
+        self.n_ticks = rng.randint(0, self.default_ticks)
         self.screen_pos = 0, 0  # todo disgusting
+        self.rect = pg.Rect(0, 0, 64, 64)
         self.set_random_position()
-        self.alpha = random.randint(0, 255)
+        alpha = rng.randint(0, 255)
+        self.alpha_level = round(alpha * (BACKGROUND_STAR_ALPHA_LEVELS - 1) / 255)
 
-    def tick(self):
+    def tick(self):  # returns whether the star looks different now
+        changed = False
         if self.n_ticks == 0:
             self.increment_frame()
             self.n_ticks = self.default_ticks
+            changed = True
         self.n_ticks -= 1
+        return changed
 
     def increment_frame(self):
         self.frame += 1
-        if self.frame == 7:
+        if self.frame == N_IMGS_BACKGROUND_STAR:
             self.frame = 0
             self.set_random_position()
 
     def set_random_position(self):
-        self.screen_pos = random.randint(
-            0, SCREEN_WIDTH - 64), random.randint(0, SCREEN_HEIGHT - 64)
-
-    def draw(self):
-        img: pg.Surface = IMGS_BACKGROUND_STAR[self.frame].copy()
-        # https://stackoverflow.com/a/16177852
-        img.fill((255, 255, 255, self.alpha), None, pg.BLEND_RGBA_MULT)
-        self.universe.screen.blit(img, self.screen_pos)
+        self.screen_pos = self.rng.randint(0, SCREEN_WIDTH - 64), self.rng.randint(0, SCREEN_HEIGHT - 64)
+        self.rect.topleft = self.screen_pos
@@ -1,30 +1,85 @@
 import math
 
 from globals import *
+from random_stream import RandomStream
 from .background_star import BackgroundStar
+from .text_cache import TextCache
 
 
 class Render:
     def __init__(self, universe):
         self.universe = universe
         self.last_dt = 1
+        self.rng = RandomStream(UNIVERSE_SEED)
         self.background_stars = []
+        self.background_star_rects = []  # same rect objects as the stars, for collision checks
+        self.background_star_atlas = self.build_background_star_atlas()
+        self.background = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))  # only redrawn where stars changed
+        self.trail_layer = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pg.SRCALPHA)
+        self.trail_rects = []  # drawn on the trail layer last frame
+        self.dirty_rects = []  # drawn on the screen this frame
+        self.last_dirty_rects = []
+        self.force_full_update = True
+        self.text_cache = TextCache(universe)
+        self.debug_lines = []  # last drawn lines, only changed lines are rendered again
+        self.debug_line_surfaces = []
         self.reset_background_stars()
 
-    def draw_background(self):
-        self.universe.screen.fill(BACKGROUND_COLOR)
+    @staticmethod
+    def build_background_star_atlas():  # atlas[frame][alpha_level]
+        atlas = []
+        for i in range(N_IMGS_BACKGROUND_STAR):
+            img = load_img(f"bg_star_{i}.png")
+            tinted_imgs = []
+            for alpha_level in range(BACKGROUND_STAR_ALPHA_LEVELS):
+                alpha = round(alpha_level * 255 / (BACKGROUND_STAR_ALPHA_LEVELS - 1))
+                tinted = img.copy()
+                # https://stackoverflow.com/a/16177852
+                tinted.fill((255, 255, 255, alpha), None, pg.BLEND_RGBA_MULT)
+                tinted_imgs.append(tinted)
+            atlas.append(tinted_imgs)
+
+        return atlas
+
+    def draw_background(self):  # returns the changed parts of the background
+        dirty_rects = []
         for background_star in self.background_stars:
-            background_star.tick()
-            background_star.draw()
+            old_rect = background_star.rect.copy()
+            if background_star.tick():
+                dirty_rects.append(background_star.rect.copy())
+                if old_rect != background_star.rect:  # only moved on the last frame
+                    dirty_rects.append(old_rect)
+
+        # every dirty rect blits all the stars overlapping it again, once that's more blits
+        # than there are stars, redrawing everything once is cheaper
+        overlapping = [rect.collidelistall(self.background_star_rects) for rect in dirty_rects]
+        if sum(len(indices) for indices in overlapping) >= len(self.background_stars):
+            self.redraw_background()
+            return [self.background.get_rect()]
+
+        for rect, indices in zip(dirty_rects, overlapping):
+            self.redraw_background(rect, indices)
+
+        return dirty_rects
+
+    def redraw_background(self, rect=None, indices=None):  # indices of the stars overlapping the rect
+        if rect is None:
+            background_stars = self.background_stars
+        else:
+            background_stars = [self.background_stars[i] for i in indices]
+
+        # overlapping stars are clipped to the redrawn area
+        atlas = self.background_star_atlas
+        self.background.set_clip(rect)
+        self.background.fill(BACKGROUND_COLOR)
+        self.background.blits([(atlas[background_star.frame][background_star.alpha_level],
+                                background_star.screen_pos) for background_star in background_stars], False)
+        self.background.set_clip(None)
 
     def draw_debug(self):
         if not SHOW_DEBUG:
             return
 
-        n_trace_points = 0
-        for celestial in self.universe.celestial_bodies:
-            n_trace_points += len(celestial.trace_points)
-
         fps = round(1 / self.last_dt)
 
         lines = [
@@ -40,11 +95,16 @@ class Render:
 
             f"Cam x,y: {self.universe.camera.center_pos}",
             f"Zoom: {self.universe.camera.zoom_factor}x",
-            f"Stars: {len(self.universe.get_stars())}",
+            f"Stars: {self.universe.n_stars}",
             f"Cel bodies: {len(self.universe.celestial_bodies)}",
-            f"Trace points: {n_trace_points}",
+            f"Trace points: {self.universe.trace_buffer.n_points}",
+            "",
         ]
 
+        # p50 / p99 over the last frames
+        for name, (p50, p99) in self.universe.profiler.get_summary().items():
+            lines.append(f"{name}: {p50:.2f} / {p99:.2f}ms")
+
         if self.universe.environment.celestial_body:
             celestial = self.universe.environment.celestial_body
             lines.extend([
@@ -88,38 +148,168 @@ class Render:
                 f"angle: {round(math.degrees(locked_celestial.angle))}°"
             ])
 
-        self.universe.screen.blits([(self.universe.font.render(lines[i], True, WHITE),
-                                     (0, i * 20)) for i in range(len(lines))])
+        # values change too often for the text cache, so only track what changed
+        del self.debug_line_surfaces[len(lines):]
+        for i, line in enumerate(lines):
+            if i >= len(self.debug_lines) or self.debug_lines[i] != line:
+                surf = self.universe.font.render(line, True, WHITE)
+                if i < len(self.debug_line_surfaces):
+                    self.debug_line_surfaces[i] = surf
+                else:
+                    self.debug_line_surfaces.append(surf)
+
+        self.debug_lines = lines
+        self.dirty_rects.extend(self.universe.screen.blits(
+            [(surf, (0, i * 20)) for i, surf in enumerate(self.debug_line_surfaces)]))
 
     def draw_hover_label(self):
-        hovered_celestial = self.universe.get_hovered_object()
-        if hovered_celestial:
-            label = str(hovered_celestial)
+        hovered_celestials = self.universe.get_hovered_objects()
+        if hovered_celestials:
+            label = ", ".join(str(celestial) for celestial in hovered_celestials)
+
+            self.dirty_rects.append(self.universe.screen.blit(self.text_cache.render(label, WHITE, BLACK),
+                                                             pg.mouse.get_pos()))
 
-            self.universe.screen.blit(self.universe.font.render(label, True, WHITE, BLACK), pg.mouse.get_pos())
+    def is_dirty_area_too_large(self, rects):
+        return sum(rect.w * rect.h for rect in rects) > DIRTY_RECTS_MAX_AREA * SCREEN_WIDTH * SCREEN_HEIGHT
 
     def draw_screen(self):
-        self.draw_background()
+        # outside of the dirty rects of the last frame, the screen still shows the background
+        profiler = self.universe.profiler
+        screen = self.universe.screen
+        environment = self.universe.environment
+        with profiler.scope("background"):
+            erase_rects = self.last_dirty_rects + self.draw_background()
+            full_update = not DIRTY_RECTS or self.force_full_update or environment.celestial_body or \
+                self.is_dirty_area_too_large(erase_rects)
+
+            if full_update:
+                screen.blit(self.background, (0, 0))
+            else:
+                screen.blits([(self.background, rect, rect) for rect in erase_rects], False)
 
-        if self.universe.environment.celestial_body:
-            self.universe.environment.draw()
+        self.dirty_rects = []
+        if environment.celestial_body:
+            with profiler.scope("environment_draw"):
+                environment.draw()
 
         else:
             self.draw_locked_celestial_body_lines()
-            self.universe.draw()  # todo don't draw things off that are off screen (performance)
-            self.draw_orbits()
+            if self.universe.camera.get_zoom() < LOD_POINT_ZOOM:
+                with profiler.scope("bodies"):
+                    self.draw_star_points()
+            else:
+                with profiler.scope("trails"):
+                    self.draw_trails()
+                with profiler.scope("bodies"):
+                    self.dirty_rects.extend(self.universe.draw(self.universe.get_visible_objects()))
+                    self.draw_orbits()
+
             self.draw_hover_label()
 
-        self.draw_debug()
-        self.universe.console.draw()
+        with profiler.scope("debug"):
+            self.draw_debug()
+        console_rect = self.universe.console.draw()
+        if console_rect:
+            self.dirty_rects.append(console_rect)
         self.draw_paused_screen()
 
-        pg.display.update()
+        with profiler.scope("display_update"):
+            update_rects = erase_rects + self.dirty_rects
+            if full_update or self.is_dirty_area_too_large(update_rects):
+                pg.display.update()
+            else:
+                pg.display.update(update_rects)
+
+        # the environment doesn't report what it drew, so it's all erased next frame
+        self.force_full_update = bool(environment.celestial_body)
+        self.last_dirty_rects = self.dirty_rects
+
+    def draw_star_points(self):  # whole star systems as single pixels, in one go
+        orbit_engine = self.universe.orbit_engine
+        camera = self.universe.camera
+        zoom = camera.get_zoom()
+        orbit_engine.update_positions()
+
+        stars = np.flatnonzero(orbit_engine.host_index[:orbit_engine.n] < 0)
+        x = np.round((orbit_engine.abs_x[stars] - camera.center_pos[0]) * zoom + SCREEN_CENTER[0]).astype(np.int64)
+        y = np.round((orbit_engine.abs_y[stars] - camera.center_pos[1]) * zoom + SCREEN_CENTER[1]).astype(np.int64)
+        on_screen = (x >= 0) & (x < SCREEN_WIDTH) & (y >= 0) & (y < SCREEN_HEIGHT)
+        x, y = x[on_screen], y[on_screen]
+        if not len(x):
+            return
+
+        pixels = pg.surfarray.pixels3d(self.universe.screen)
+        pixels[x, y] = STAR_COLOR
+        del pixels  # unlocks the screen
+
+        self.dirty_rects.append(pg.Rect(x.min(), y.min(), x.max() - x.min() + 1, y.max() - y.min() + 1))
+
+    def draw_trails(self):
+        trace_buffer = self.universe.trace_buffer
+        orbit_engine = self.universe.orbit_engine
+        camera_center = self.universe.camera.center_pos
+        zoom = self.universe.camera.get_zoom()
+        band_size = 256 // TRAIL_ALPHA_BANDS
+        stride = max(1, round(1 / zoom))  # zoomed out, trails only use every nth point
+
+        # no trails for guests that are drawn as part of their host, or for bodies whose
+        # whole star system is off screen
+        n = orbit_engine.n
+        orbit_engine.update_positions()
+        left, top, right, bottom = self.universe.camera.get_abs_screen_rect()
+        root_index = orbit_engine.root_index[:n]
+        root_x, root_y = orbit_engine.abs_x[root_index], orbit_engine.abs_y[root_index]
+        reach = orbit_engine.reach[:n]
+        trailing = np.flatnonzero((trace_buffer.size[:n] > 0) &
+                                  (orbit_engine.dist[:n] * zoom >= LOD_MIN_ORBIT_PIXELS) &
+                                  (root_x + reach >= left) & (root_x - reach <= right) &
+                                  (root_y + reach >= top) & (root_y - reach <= bottom))
+
+        # all trails go onto one reusable layer, only the parts with trails are cleared and blitted
+        for rect in self.trail_rects:
+            self.trail_layer.fill((0, 0, 0, 0), rect)
+
+        self.trail_rects = []
+        for index in trailing:
+            celestial = self.universe.celestial_bodies[index]
+            x, y, ages = trace_buffer.get_points(index)
+            if stride > 1:  # always keep the newest point
+                kept = np.arange(len(ages) - 1, -1, -stride)[::-1]
+                x, y, ages = x[kept], y[kept], ages[kept]
+
+            # from the oldest point to the current center of the body
+            center_x, center_y = celestial.get_render_center()
+            x = (np.append(x, center_x) - camera_center[0]) * zoom + SCREEN_CENTER[0]
+            y = (np.append(y, center_y) - camera_center[1]) * zoom + SCREEN_CENTER[1]
+            if x.max() < 0 or x.min() > SCREEN_WIDTH or y.max() < 0 or y.min() > SCREEN_HEIGHT:
+                continue
+
+            # a segment fades with the age of its newer point
+            segment_ages = np.append(ages[1:], ages[-1])
+            alphas = np.clip(np.floor((1 - segment_ages / trace_buffer.max_age) * 255), 0, 255)
+            bands = alphas.astype(np.int64) // band_size * band_size
+
+            # ages only go down along the trail, so every band is one run of segments
+            points = np.column_stack((np.round(x), np.round(y))).tolist()
+            run_starts = np.flatnonzero(np.diff(bands)) + 1
+            r, g, b = celestial.color
+            run_rects = []
+            for start, end in zip([0, *run_starts], [*run_starts, len(bands)]):
+                if bands[start]:
+                    run_rects.append(pg.draw.lines(self.trail_layer, (r, g, b, int(bands[start])), False,
+                                                   points[start:end + 1], trace_buffer.line_width))
+
+            if run_rects:
+                self.trail_rects.append(run_rects[0].unionall(run_rects[1:]))
+
+        self.universe.screen.blits([(self.trail_layer, rect, rect) for rect in self.trail_rects], False)
+        self.dirty_rects.extend(self.trail_rects)
 
     def draw_orbits(self):
         if SHOW_GUEST_ORBITS:
             for celestial in self.universe.celestial_bodies:
-                celestial.draw_guest_orbits()
+                self.dirty_rects.extend(celestial.draw_guest_orbits())
 
     def draw_locked_celestial_body_lines(self):
         locked_celestial = self.universe.camera.locked_celestial
@@ -128,23 +318,26 @@ class Render:
             return
 
         for guest in locked_celestial.guests:
-            pg.draw.line(self.universe.screen, GREEN, SCREEN_CENTER,
-                         guest.get_center_on_screen())
+            self.dirty_rects.append(pg.draw.line(self.universe.screen, GREEN, SCREEN_CENTER,
+                                                 guest.get_center_on_screen()))
 
         host = locked_celestial.host
         if host:
-            pg.draw.line(self.universe.screen, CYAN, SCREEN_CENTER,
-                         host.get_center_on_screen())
+            self.dirty_rects.append(pg.draw.line(self.universe.screen, CYAN, SCREEN_CENTER,
+                                                 host.get_center_on_screen()))
 
     def reset_background_stars(self):
         for i in range(N_BACKGROUND_STARS):
-            self.background_stars.append(BackgroundStar(self.universe))
+            self.background_stars.append(BackgroundStar(self.universe, self.rng))
+
+        self.background_star_rects = [background_star.rect for background_star in self.background_stars]
+        self.redraw_background()
 
     def draw_paused_screen(self):
         if not self.universe.paused:
             return
 
-        surf = self.universe.font.render("PAUSED", True, WHITE, BLACK)
+        surf = self.text_cache.render("PAUSED", WHITE, BLACK)
         rect: pg.Rect = surf.get_rect()
-        self.universe.screen.blit(
-            surf, (SCREEN_CENTER[0] - rect.center[0], SCREEN_CENTER[1] - rect.center[1]))
+        self.dirty_rects.append(self.universe.screen.blit(
+            surf, (SCREEN_CENTER[0] - rect.center[0], SCREEN_CENTER[1] - rect.center[1])))
@@ -0,0 +1,28 @@
+from collections import OrderedDict
+
+from globals import *
+
+
+# rendered text surfaces, least recently used ones are evicted first
+class TextCache:
+    def __init__(self, universe, max_size=TEXT_CACHE_SIZE):
+        self.universe = universe
+        self.max_size = max_size
+        self.surfaces = OrderedDict()  # (text, color, background): surface
+
+    def render(self, text, color, background=None):
+        key = text, color, background
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            return surf
+
+        surf = self.universe.font.render(text, True, color, background)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+
+        return surf
+
+    def clear(self):
+        self.surfaces.clear()
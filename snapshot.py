@@ -0,0 +1,214 @@
+import json
+
+from globals import *
+from space.celestial_body import CelestialBody
+from space.moon import Moon
+from space.planet import Planet
+from space.star import Star
+
+SNAPSHOT_VERSION = 1
+CELESTIAL_TYPES = Star, Planet, Moon  # stored as index into this tuple
+BODY_COLUMNS = ("type", "uuid", "name", "color", "angle", "epoch_angle", "radial_vel", "dist", "radius",
+                "host_index", "abs_x", "abs_y")  # one value per body
+TRACE_COLUMNS = "trace_x", "trace_y", "trace_times", "trace_head", "trace_size", "trace_last_time"
+
+
+# binary snapshots: one numpy array per column, all bodies in index order
+def save_snapshot(universe, path, include_traces=False):
+    orbit_engine = universe.orbit_engine
+    orbit_engine.update_positions()
+    n = orbit_engine.n
+    celestials = universe.celestial_bodies
+
+    columns = {
+        "version": np.array(SNAPSHOT_VERSION),
+        "age": np.array(universe.age),
+        "next_uuid": np.array(universe.next_uuid),
+        "type": np.array([CELESTIAL_TYPES.index(type(celestial)) for celestial in celestials], dtype=np.int8),
+        "uuid": np.array([celestial.uuid for celestial in celestials], dtype=np.int64),
+        "name": np.array([celestial.name for celestial in celestials], dtype=str),
+        "color": np.array([celestial.color for celestial in celestials], dtype=np.uint8).reshape(n, 3),
+        "angle": orbit_engine.angle[:n],
+        "epoch_angle": orbit_engine.epoch_angle[:n],
+        "radial_vel": orbit_engine.radial_vel[:n],
+        "dist": orbit_engine.dist[:n],
+        "radius": orbit_engine.radius[:n],
+        "host_index": orbit_engine.host_index[:n],
+        "abs_x": orbit_engine.abs_x[:n],
+        "abs_y": orbit_engine.abs_y[:n],
+    }
+
+    if include_traces:
+        trace_buffer = universe.trace_buffer
+        trace_x, trace_y = trace_buffer.get_abs_points(n)
+        columns.update({
+            "trace_x": trace_x,
+            "trace_y": trace_y,
+            "trace_times": trace_buffer.times[:n],
+            "trace_head": trace_buffer.head[:n],
+            "trace_size": trace_buffer.size[:n],
+            "trace_last_time": trace_buffer.last_time[:n],
+        })
+
+    np.savez(path, **columns)
+    print(f"Saved {n} cel bodies to {path}")
+
+
+def load_snapshot(universe, path):
+    with np.load(path) as snapshot:
+        validate_snapshot(snapshot)
+        universe.clear()
+        universe.age = float(snapshot["age"])
+        universe.orbit_engine.load(universe.age, snapshot["angle"], snapshot["epoch_angle"],
+                                   snapshot["radial_vel"], snapshot["dist"], snapshot["radius"],
+                                   snapshot["host_index"], snapshot["abs_x"], snapshot["abs_y"])
+
+        trace_buffer = universe.trace_buffer
+        if "trace_size" in snapshot:
+            trace_buffer.load(*(snapshot[column] for column in TRACE_COLUMNS))
+        else:
+            trace_buffer.ensure_capacity(len(snapshot["type"]))
+            trace_buffer.clear()
+
+        celestials = universe.celestial_bodies
+        for index, (type_index, host_index, uuid, name, color) in enumerate(zip(
+                snapshot["type"].tolist(), snapshot["host_index"].tolist(), snapshot["uuid"].tolist(),
+                snapshot["name"].tolist(), snapshot["color"].tolist())):
+            host = celestials[host_index] if host_index >= 0 else None
+            CELESTIAL_TYPES[type_index].restore(universe, index, host, tuple(color), uuid, name)
+
+        universe.n_stars = int(np.count_nonzero(snapshot["host_index"] < 0))
+        universe.next_uuid = int(snapshot["next_uuid"])
+
+    print(f"Loaded {len(celestials)} cel bodies from {path}")
+
+
+def validate_snapshot(snapshot):  # raises ValueError, before anything is cleared
+    missing = [column for column in ("version", "age", "next_uuid", *BODY_COLUMNS) if column not in snapshot]
+    if "trace_size" in snapshot:
+        missing += [column for column in TRACE_COLUMNS if column not in snapshot]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+
+    if int(snapshot["version"]) != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {int(snapshot['version'])}")
+
+    n = len(snapshot["type"])
+    columns = BODY_COLUMNS + (TRACE_COLUMNS if "trace_size" in snapshot else ())
+    if any(len(snapshot[column]) != n for column in columns):
+        raise ValueError("Columns of different lengths")
+
+
+# json templates: nested stars -> guests -> guests, missing values are generated randomly
+def get_template_defaults(universe, celestial_type, host):  # the same as the constructors generate
+    rng = universe.rng
+    if celestial_type is Star:
+        return {"radius": get_random_radius(rng, RADIUS_SUN, STAR_RADIUS_VARIANCE), "color": STAR_COLOR}
+
+    if celestial_type is Planet:
+        return {"dist": get_random_dist(rng, host, DISTANCE_EARTH, PLANET_DISTANCE_VARIANCE),
+                "radius": get_random_radius(rng, RADIUS_EARTH, PLANET_RADIUS_VARIANCE)}
+
+    return {"dist": get_random_dist(rng, host, host.radius * 2 + DISTANCE_MOON * len(host.guests), 0),
+            "radius": RADIUS_MOON, "radial_vel": 2 * math.pi * rng.uniform(0.5, 4), "color": MOON_COLOR}
+
+
+def is_number(value):  # json also has booleans, NaN and Infinity
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def validate_template_data(data, is_star):  # raises ValueError, before anything is cleared
+    if not isinstance(data, dict):
+        raise ValueError(f"{data} is not a cel body")
+
+    name = data.get("name", "unnamed")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError(f"name {name} is not a text")
+    if is_star and "center" not in data:
+        raise ValueError(f"star {name} has no center")
+    if "center" in data and not (isinstance(data["center"], list) and len(data["center"]) == 2 and
+                                 all(is_number(value) for value in data["center"])):
+        raise ValueError(f"center of {name} is not a list of 2 numbers")
+    if "color" in data and not (isinstance(data["color"], list) and len(data["color"]) == 3 and
+                                all(is_number(value) and value == int(value) and 0 <= value <= 255
+                                    for value in data["color"])):
+        raise ValueError(f"color of {name} is not a list of 3 whole numbers from 0 to 255")
+    for key in "dist", "radius", "angle", "radial_vel":
+        if key in data and not is_number(data[key]):
+            raise ValueError(f"{key} of {name} is not a number")
+    if data.get("radius", 1) <= 0:
+        raise ValueError(f"radius of {name} is not positive")
+    if not isinstance(data.get("guests", []), list):
+        raise ValueError(f"guests of {name} are not a list")
+
+    for guest_data in data.get("guests", []):
+        validate_template_data(guest_data, False)
+
+
+def create_celestial(universe, celestial_type, host, data):
+    # skips the constructors of the subclasses, which generate random guests
+    data = {**get_template_defaults(universe, celestial_type, host), **data}
+    celestial = celestial_type.__new__(celestial_type)
+    CelestialBody.__init__(celestial, universe, host, data.get("dist", 0), data["radius"],
+                           data.get("angle"), data.get("radial_vel"),
+                           tuple(int(value) for value in data["color"]) if "color" in data else None, data.get("name"))
+    if host:
+        host.guests.append(celestial)
+    else:
+        celestial.abs_center = tuple(data["center"])
+        universe.n_stars += 1
+
+    for guest_data in data.get("guests", []):
+        create_celestial(universe, Moon if host else Planet, celestial, guest_data)
+
+    return celestial
+
+
+def load_template(universe, path):
+    with open(path) as f:
+        template = json.load(f)
+
+    if not isinstance(template, dict) or not isinstance(template.get("stars"), list):
+        raise ValueError("no list of stars")
+    if not is_number(template.get("age", 0)):
+        raise ValueError("age is not a number")
+    for star_data in template["stars"]:
+        validate_template_data(star_data, True)
+
+    universe.clear()
+    universe.age = template.get("age", 0)
+    universe.orbit_engine.time = universe.age
+    for star_data in template["stars"]:
+        create_celestial(universe, Star, None, star_data)
+
+    print(f"Loaded {len(universe.celestial_bodies)} cel bodies from template {path}")
+
+
+def get_template_data(celestial):
+    data = {
+        "name": celestial.name,
+        "radius": celestial.radius,
+        "color": list(celestial.color),
+    }
+
+    if celestial.host:
+        data.update(dist=celestial.dist, angle=celestial.angle, radial_vel=celestial.radial_vel)
+    else:
+        data["center"] = list(celestial.abs_center)
+
+    if celestial.guests:
+        data["guests"] = [get_template_data(guest) for guest in celestial.guests]
+
+    return data
+
+
+def save_template(universe, path):
+    template = {
+        "age": universe.age,
+        "stars": [get_template_data(star) for star in universe.get_stars()],
+    }
+
+    with open(path, "w") as f:
+        json.dump(template, f, indent=2)
+
+    print(f"Saved template to {path}")
@@ -5,9 +5,12 @@ from .celestial_body import CelestialBody
 
 
 class Moon(CelestialBody):
+    __slots__ = ()
+
     def __init__(self, universe, host, dist):
-        print("Moon init...")
-        super().__init__(universe, host, dist, RADIUS_MOON, radial_vel=2 * math.pi * random.uniform(0.5, 4),
+        log.debug("Moon init...")
+        super().__init__(universe, host, dist, RADIUS_MOON, radial_vel=2 * math.pi * universe.rng.uniform(0.5, 4),
                          color=MOON_COLOR)
 
-        print(f"{self} @ {self.get_abs_center()} init, host={self.host}")
+        if log.isEnabledFor(logging.DEBUG):  # resolving the center isn't free
+            log.debug(f"{self} @ {self.get_abs_center()} init, host={self.host}")
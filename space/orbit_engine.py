@@ -0,0 +1,264 @@
+from globals import *
+
+
+# orbital state of all celestial bodies as contiguous arrays, index i belongs to
+# universe.celestial_bodies[i]. hosts are created before their guests, but a guest can
+# switch hosts later, so bodies are resolved by depth and never by index order
+class OrbitEngine:
+    columns = ("angle", "epoch_angle", "radial_vel", "dist", "radius", "host_index", "abs_x", "abs_y",
+               "root_index", "reach", "previous_x", "previous_y")
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.capacity = capacity
+        self.time = 0  # same as the age of the universe
+        self.angle = np.zeros(capacity)
+        self.epoch_angle = np.zeros(capacity)  # angle at time 0, angle = epoch_angle + radial_vel * time
+        self.radial_vel = np.zeros(capacity)
+        self.dist = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.host_index = np.full(capacity, -1, dtype=np.int64)
+
+        # absolute centers, only stars (roots) are set directly, the rest is resolved
+        self.abs_x = np.zeros(capacity)
+        self.abs_y = np.zeros(capacity)
+        self.root_index = np.zeros(capacity, dtype=np.int64)  # star of the system
+        self.reach = np.zeros(capacity)  # max distance from that star, sum of the dists up the chain
+        self.levels = []  # body indices grouped by depth: stars, planets, moons, ...
+        self.levels_dirty = False
+        self.positions_dirty = False
+        self.version = 0  # increases every time the positions are resolved again
+        self.structure_version = 0  # increases whenever anything but the time changes
+
+        # absolute centers before the last tick, rendering interpolates between them
+        self.previous_x = np.zeros(capacity)
+        self.previous_y = np.zeros(capacity)
+        self.n_previous = 0  # bodies added after that have no previous center yet
+        self.interpolation = 1  # 0 = previous centers, 1 = current centers
+
+    def add(self, host, dist, radius, angle, radial_vel):
+        if self.n == self.capacity:
+            self.grow()
+
+        index = self.n
+        self.angle[index] = angle
+        self.radial_vel[index] = radial_vel
+        self.epoch_angle[index] = angle - radial_vel * self.time
+        self.dist[index] = dist or 0
+        self.radius[index] = radius
+        self.host_index[index] = -1 if host is None else host.index
+        self.n += 1
+        self.levels_dirty = True
+        self.structure_version += 1
+
+        # a new body moves nothing else, so only it has to be resolved
+        if host is None:
+            self.abs_x[index] = self.abs_y[index] = 0
+            self.root_index[index] = index
+            self.reach[index] = 0
+        elif not self.positions_dirty:
+            self.abs_x[index] = self.abs_x[host.index] + self.dist[index] * math.cos(angle)
+            self.abs_y[index] = self.abs_y[host.index] + self.dist[index] * math.sin(angle)
+            self.root_index[index] = self.root_index[host.index]
+            self.reach[index] = self.reach[host.index] + self.dist[index]
+
+        self.version += 1
+        return index
+
+    def load(self, time, angle, epoch_angle, radial_vel, dist, radius, host_index, abs_x, abs_y):
+        n = len(angle)
+        while self.capacity < n:
+            self.grow()
+
+        self.n = n
+        self.time = time
+        self.angle[:n] = angle
+        self.epoch_angle[:n] = epoch_angle
+        self.radial_vel[:n] = radial_vel
+        self.dist[:n] = dist
+        self.radius[:n] = radius
+        self.host_index[:n] = host_index
+        self.abs_x[:n] = abs_x
+        self.abs_y[:n] = abs_y
+        self.n_previous = 0
+        self.levels_dirty = self.positions_dirty = True
+        self.structure_version += 1
+
+    def grow(self):
+        self.capacity *= 2
+        for column in self.columns:
+            setattr(self, column, np.resize(getattr(self, column), self.capacity))
+
+    def remove(self, removed):  # removed[i] is whether body i goes, hosts only go with all their guests
+        n = self.n
+        kept = ~removed[:n]
+        new_index = np.cumsum(kept) - 1
+        self.n = int(new_index[-1]) + 1 if n else 0
+        for column in self.columns:
+            array = getattr(self, column)
+            array[:self.n] = array[:n][kept]
+
+        host_index = self.host_index[:self.n]
+        has_host = host_index >= 0
+        host_index[has_host] = new_index[host_index[has_host]]
+
+        self.n_previous = 0
+        self.levels_dirty = self.positions_dirty = True
+        self.structure_version += 1
+
+    def rebase_epochs(self, start, end):  # the current angles become the angles at time 0
+        epoch_angle = self.epoch_angle[start:end]
+        epoch_angle[:] = self.angle[start:end]
+        angle = np.mod(epoch_angle + self.radial_vel[start:end] * self.time, 2 * math.pi)
+        np.copyto(self.angle[start:end], angle, where=self.host_index[start:end] >= 0)
+        self.positions_dirty = True
+        self.structure_version += 1
+
+    def clear(self):
+        self.n = 0
+        self.n_previous = 0
+        self.levels = []
+        self.levels_dirty = False
+        self.positions_dirty = True
+        self.structure_version += 1
+
+    def set_host(self, index, host_index):  # systems stay in any order, only sharding needs them contiguous
+        self.host_index[index] = host_index
+        self.levels_dirty = self.positions_dirty = True
+        self.structure_version += 1
+
+    def set_angle(self, index, angle):
+        self.angle[index] = angle
+        self.epoch_angle[index] = angle - self.radial_vel[index] * self.time
+        self.positions_dirty = True
+        self.structure_version += 1
+
+    def set_radial_vel(self, index, radial_vel):  # keeps the current angle
+        self.radial_vel[index] = radial_vel
+        self.epoch_angle[index] = self.angle[index] - radial_vel * self.time
+        self.structure_version += 1
+
+    def set_root_center(self, index, abs_center):
+        self.abs_x[index], self.abs_y[index] = abs_center
+        self.structure_version += 1
+        if index == self.n - 1:  # the newest body has no guests that move along
+            self.version += 1
+        else:
+            self.positions_dirty = True
+
+    def invalidate_positions(self):  # e.g. a changed dist
+        self.positions_dirty = True
+        self.structure_version += 1
+
+    def store_previous_positions(self):
+        self.update_positions()
+        n = self.n
+        self.previous_x[:n] = self.abs_x[:n]
+        self.previous_y[:n] = self.abs_y[:n]
+        self.n_previous = n
+
+    def tick(self, dt):
+        self.time += dt
+        if ANALYTIC_ORBITS:
+            self.evaluate()
+            return
+
+        if not VECTORIZED_ORBITS:  # every body updates its own angle
+            return
+
+        n = self.n
+        angle = self.angle[:n]
+        # stars have no host and don't orbit anything
+        np.add(angle, self.radial_vel[:n] * dt, out=angle, where=self.host_index[:n] >= 0)
+        np.mod(angle, 2 * math.pi, out=angle)
+        self.positions_dirty = True
+
+    def evaluate(self):  # closed form, no matter how much time passed
+        n = self.n
+        angle = self.epoch_angle[:n] + self.radial_vel[:n] * self.time
+        np.mod(angle, 2 * math.pi, out=angle)
+        np.copyto(self.angle[:n], angle, where=self.host_index[:n] >= 0)
+        self.positions_dirty = True
+
+    def set_time(self, time):
+        if not ANALYTIC_ORBITS:  # integrated angles drifted away from the epoch angles
+            n = self.n
+            self.epoch_angle[:n] = self.angle[:n] - self.radial_vel[:n] * self.time
+            self.structure_version += 1
+
+        self.time = time
+        self.evaluate()
+        self.n_previous = 0  # don't interpolate across the jump
+
+    def update_levels(self):
+        n = self.n
+        host_index = self.host_index[:n]
+        has_host = host_index >= 0
+
+        # propagate depth down the host chains, one pass per level of depth
+        depth = np.zeros(n, dtype=np.int64)
+        for _ in range(n):
+            new_depth = np.where(has_host, depth[host_index] + 1, 0)
+            if np.array_equal(new_depth, depth):
+                break
+            depth = new_depth
+
+        order = np.argsort(depth, kind="stable")
+        self.levels = np.split(order, np.cumsum(np.bincount(depth))[:-1]) if n else []
+        self.levels_dirty = False
+
+    def update_positions(self):
+        if not self.positions_dirty:
+            return
+
+        # hosts are always resolved before their guests, level 0 are the stars
+        self.update_roots()
+        for level in self.levels[1:]:
+            host_index = self.host_index[level]
+            dist = self.dist[level]
+            angle = self.angle[level]
+            self.abs_x[level] = self.abs_x[host_index] + dist * np.cos(angle)
+            self.abs_y[level] = self.abs_y[host_index] + dist * np.sin(angle)
+
+        self.positions_dirty = False
+        self.version += 1
+
+    def update_roots(self):  # the star and reach of every body, the centers stay as they are
+        if self.levels_dirty:
+            self.update_levels()
+
+        if len(self.levels):
+            stars = self.levels[0]
+            self.root_index[stars] = stars
+            self.reach[stars] = 0
+
+        for level in self.levels[1:]:
+            host_index = self.host_index[level]
+            self.root_index[level] = self.root_index[host_index]
+            self.reach[level] = self.reach[host_index] + self.dist[level]
+
+    def set_positions(self, abs_x, abs_y, angle=None):  # from elsewhere, e.g. a recording or the shard pool
+        n = self.n
+        if self.positions_dirty:  # e.g. just loaded, the centers are given but the systems aren't resolved yet
+            self.update_roots()
+
+        self.abs_x[:n] = abs_x
+        self.abs_y[:n] = abs_y
+        if angle is not None:
+            self.angle[:n] = angle
+        self.positions_dirty = False
+        self.version += 1
+
+    def get_abs_center(self, index):
+        self.update_positions()
+        return float(self.abs_x[index]), float(self.abs_y[index])
+
+    def get_render_center(self, index):
+        self.update_positions()
+        if index >= self.n_previous:  # new bodies don't move in from wherever the previous centers were
+            return float(self.abs_x[index]), float(self.abs_y[index])
+
+        t = self.interpolation
+        previous_x, previous_y = self.previous_x[index], self.previous_y[index]
+        return float(previous_x + (self.abs_x[index] - previous_x) * t), \
+            float(previous_y + (self.abs_y[index] - previous_y) * t)
@@ -4,24 +4,27 @@ from .moon import Moon
 
 
 class Planet(CelestialBody):
+    __slots__ = ()
+
     def __init__(self, universe, host, dist=0, radius=0):
-        print("Planet init...")
+        log.debug("Planet init...")
 
         if not dist:
-            dist = get_random_dist(host, DISTANCE_EARTH, PLANET_DISTANCE_VARIANCE)
+            dist = get_random_dist(universe.rng, host, DISTANCE_EARTH, PLANET_DISTANCE_VARIANCE)
 
         if not radius:
-            radius = get_random_radius(RADIUS_EARTH, PLANET_RADIUS_VARIANCE)
+            radius = get_random_radius(universe.rng, RADIUS_EARTH, PLANET_RADIUS_VARIANCE)
 
         super().__init__(universe, host, dist, radius)
 
         self.create_moons()
 
-        print(f"{self} @ {self.get_abs_center()} init, host={self.host}")
+        if log.isEnabledFor(logging.DEBUG):  # resolving the center isn't free
+            log.debug(f"{self} @ {self.get_abs_center()} init, host={self.host}")
 
     def create_moons(self, n=0):
         if not n:
-            rand = random.random()
+            rand = self.universe.rng.random()
             if rand > 0.95:
                 n = 4
             elif rand > 0.9:
@@ -37,5 +40,5 @@ class Planet(CelestialBody):
             self.add_moon()
 
     def add_moon(self):
-        dist = get_random_dist(self, self.radius * 2 + DISTANCE_MOON * len(self.guests), 0)
+        dist = get_random_dist(self.universe.rng, self, self.radius * 2 + DISTANCE_MOON * len(self.guests), 0)
         self.guests.append(Moon(self.universe, self, dist))
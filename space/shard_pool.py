@@ -0,0 +1,137 @@
+import multiprocessing as mp
+
+from globals import *
+from .orbit_engine import OrbitEngine
+
+# columns shared with the shard processes, all float64. host_index is exact as a float
+SHARED_COLUMNS = "angle", "epoch_angle", "radial_vel", "dist", "radius", "host_index", "abs_x", "abs_y"
+
+
+def get_shared_arrays(buffer, capacity):
+    data = np.frombuffer(buffer, dtype=np.float64)
+    return {column: data[i * capacity:(i + 1) * capacity] for i, column in enumerate(SHARED_COLUMNS)}
+
+
+def run_shard(connection, buffer, capacity):
+    # star systems never interact, so a shard of whole systems is just a smaller orbit engine
+    arrays = get_shared_arrays(buffer, capacity)
+    orbit_engine = OrbitEngine()
+    start = end = 0
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+
+        if message[0] == "load":
+            _, start, end = message
+            host_index = arrays["host_index"][start:end].astype(np.int64)
+            host_index[host_index >= 0] -= start
+            orbit_engine.load(0, *(arrays[column][start:end] for column in SHARED_COLUMNS[:5]),
+                              host_index, arrays["abs_x"][start:end], arrays["abs_y"][start:end])
+
+        elif message[0] == "tick":
+            orbit_engine.time = message[1]
+            orbit_engine.evaluate()
+            orbit_engine.update_positions()
+            n = orbit_engine.n
+            arrays["angle"][start:end] = orbit_engine.angle[:n]
+            arrays["abs_x"][start:end] = orbit_engine.abs_x[:n]
+            arrays["abs_y"][start:end] = orbit_engine.abs_y[:n]
+            connection.send(True)
+
+
+# evaluates the orbits on a pool of processes, each owning a contiguous range of whole
+# star systems. the arrays live in shared memory, only the time and the ranges are sent
+class ShardPool:
+    def __init__(self, universe, n_processes):
+        self.universe = universe
+        self.n_processes = n_processes
+        self.capacity = 0
+        self.buffer = None
+        self.arrays = {}
+        self.processes = []
+        self.connections = []
+        self.shards = []  # (start, end) per process, empty when the bodies can't be sharded
+        self.structure_version = None
+
+    def start(self, capacity):
+        self.stop()
+        self.capacity = capacity
+        self.buffer = mp.RawArray("d", capacity * len(SHARED_COLUMNS))
+        self.arrays = get_shared_arrays(self.buffer, capacity)
+        for i in range(self.n_processes):
+            connection, child_connection = mp.Pipe()
+            process = mp.Process(target=run_shard, args=(child_connection, self.buffer, capacity), daemon=True)
+            process.start()
+            self.processes.append(process)
+            self.connections.append(connection)
+
+        self.structure_version = None
+        log.info(f"Started {self.n_processes} shard processes for {capacity} cel bodies")
+
+    def stop(self):
+        for connection in self.connections:
+            connection.send(None)
+        for process in self.processes:
+            process.join()
+
+        self.processes = []
+        self.connections = []
+        self.shards = []
+
+    def sync(self):  # send the bodies again after anything but the time changed
+        orbit_engine = self.universe.orbit_engine
+        if orbit_engine.structure_version == self.structure_version:
+            return bool(self.shards)
+
+        n = orbit_engine.n
+        if n > self.capacity or self.buffer is None:
+            self.start(orbit_engine.capacity)
+
+        self.structure_version = orbit_engine.structure_version
+        self.shards = self.get_shards() if ANALYTIC_ORBITS else []
+        if not self.shards:
+            return False
+
+        orbit_engine.update_positions()  # the centers of the stars
+        for column in SHARED_COLUMNS:
+            self.arrays[column][:n] = getattr(orbit_engine, column)[:n]
+
+        for connection, (start, end) in zip(self.connections, self.shards):
+            connection.send(("load", start, end))
+
+        return True
+
+    def get_shards(self):
+        orbit_engine = self.universe.orbit_engine
+        orbit_engine.update_positions()
+        n = orbit_engine.n
+        stars = np.flatnonzero(orbit_engine.host_index[:n] < 0)
+
+        # every system must be one contiguous range, which holds unless a body switched hosts
+        if not np.array_equal(orbit_engine.root_index[:n], np.repeat(stars, np.diff(np.append(stars, n)))):
+            log.warning("Star systems aren't contiguous, not sharding")
+            return []
+
+        # cut at the stars closest to equal numbers of bodies per process
+        cuts = stars[np.searchsorted(stars, np.linspace(0, n, self.n_processes + 1)[1:-1])
+                     .clip(max=len(stars) - 1)].tolist() if len(stars) else []
+        bounds = [0, *cuts, n]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def tick(self, dt):
+        orbit_engine = self.universe.orbit_engine
+        if not self.sync():
+            orbit_engine.tick(dt)
+            return
+
+        orbit_engine.time += dt
+        busy = [connection for connection, (start, end) in zip(self.connections, self.shards) if end > start]
+        for connection in busy:
+            connection.send(("tick", orbit_engine.time))
+        for connection in busy:
+            connection.recv()
+
+        n = orbit_engine.n
+        orbit_engine.set_positions(self.arrays["abs_x"][:n], self.arrays["abs_y"][:n], self.arrays["angle"][:n])
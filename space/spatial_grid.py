@@ -0,0 +1,66 @@
+from globals import *
+
+
+# uniform grid over the absolute centers of all celestial bodies, rebuilt whenever
+# the orbit engine resolved new positions. a body is only stored in the cell of its
+# center, queries are widened by the largest radius instead
+class SpatialGrid:
+    cell_size = 256
+
+    def __init__(self, universe):
+        self.universe = universe
+        self.version = None
+        self.keys = np.zeros(0, dtype=np.int64)  # sorted cell keys
+        self.order = np.zeros(0, dtype=np.int64)  # body index for every key
+        self.max_radius = 0
+
+    @staticmethod
+    def get_cell_keys(cell_x, cell_y):  # all cells of one column are consecutive
+        return cell_x * 2 ** 32 + cell_y
+
+    def update(self):
+        orbit_engine = self.universe.orbit_engine
+        orbit_engine.update_positions()
+        if self.version == orbit_engine.version:
+            return
+
+        n = orbit_engine.n
+        cell_x = np.floor_divide(orbit_engine.abs_x[:n], self.cell_size).astype(np.int64)
+        cell_y = np.floor_divide(orbit_engine.abs_y[:n], self.cell_size).astype(np.int64)
+        keys = self.get_cell_keys(cell_x, cell_y)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        self.max_radius = orbit_engine.radius[:n].max() if n else 0
+        self.version = orbit_engine.version
+
+    def get_candidates(self, left, top, right, bottom):
+        self.update()
+        first_x, last_x = (math.floor(edge / self.cell_size) for edge in
+                           (left - self.max_radius, right + self.max_radius))
+        first_y, last_y = (math.floor(edge / self.cell_size) for edge in
+                           (top - self.max_radius, bottom + self.max_radius))
+
+        if last_x - first_x >= len(self.keys):  # cheaper to just check everything
+            return self.order
+
+        columns = []
+        for cell_x in range(first_x, last_x + 1):
+            start = np.searchsorted(self.keys, self.get_cell_keys(cell_x, first_y), "left")
+            end = np.searchsorted(self.keys, self.get_cell_keys(cell_x, last_y), "right")
+            columns.append(self.order[start:end])
+
+        return np.concatenate(columns) if columns else self.order[:0]
+
+    def query_rect(self, left, top, right, bottom):  # indices of circles overlapping the rect
+        candidates = self.get_candidates(left, top, right, bottom)
+        orbit_engine = self.universe.orbit_engine
+        x = orbit_engine.abs_x[candidates]
+        y = orbit_engine.abs_y[candidates]
+        radius = orbit_engine.radius[candidates]
+
+        dx = np.clip(x, left, right) - x
+        dy = np.clip(y, top, bottom) - y
+        return np.sort(candidates[dx * dx + dy * dy <= radius * radius])
+
+    def query_point(self, x, y):  # indices of circles containing the point
+        return self.query_rect(x, y, x, y)
@@ -5,28 +5,34 @@ from .planet import Planet
 
 
 class Star(CelestialBody):
-    def __init__(self, universe, abs_center, radius=0, n_planets=0):
-        print("Star init...")
+    __slots__ = ()
+
+    def __init__(self, universe, abs_center, radius=0, n_planets=0, name=None):
+        log.debug("Star init...")
 
         if not radius:
             radius = get_random_radius(
-                RADIUS_SUN, STAR_RADIUS_VARIANCE)
+                universe.rng, RADIUS_SUN, STAR_RADIUS_VARIANCE)
 
+        super().__init__(universe, None, None, radius, color=STAR_COLOR, name=name)
+        self.universe.n_stars += 1
         self.abs_center = abs_center
-        super().__init__(universe, None, None, radius, color=STAR_COLOR)
 
         self.generate_planets(n_planets)
 
-        print(f"{self} @ {self.get_abs_center()} init, n_planets={n_planets}")
+        if log.isEnabledFor(logging.DEBUG):  # resolving the center isn't free
+            log.debug(f"{self} @ {self.get_abs_center()} init, n_planets={n_planets}")
 
     def tick(self, dt):
         pass
 
-    def draw(self):
-        self.draw_circle()
+    @property
+    def abs_center(self):
+        return self.get_abs_center_float()
 
-    def get_abs_center_float(self):
-        return self.abs_center
+    @abs_center.setter
+    def abs_center(self, value):
+        self.universe.orbit_engine.set_root_center(self.index, value)
 
     def generate_planets(self, n):
         for i in range(n):
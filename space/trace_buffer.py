@@ -0,0 +1,130 @@
+from globals import *
+
+
+# trace points of all celestial bodies, one fixed-length ring buffer row per body
+# (same index as the orbit engine). a point's age is derived from its timestamp.
+# points are stored as float32 offsets from the star of the system, stars never
+# move, so that stays exact enough anywhere in an unbounded galaxy
+class TraceBuffer:
+    max_age = TRACE_POINT_MAX_AGE
+    line_width = 1
+
+    def __init__(self, universe, capacity=64, length=MAX_TRACE_POINTS):
+        self.universe = universe
+        self.capacity = capacity
+        self.length = length
+        self.frequency = min(MAX_TRACE_POINTS, MAX_FPS)
+        self.n_points = 0
+
+        self.x = np.zeros((capacity, length), dtype=np.float32)
+        self.y = np.zeros((capacity, length), dtype=np.float32)
+        self.times = np.zeros((capacity, length))
+        self.head = np.zeros(capacity, dtype=np.int64)  # index of the oldest point
+        self.size = np.zeros(capacity, dtype=np.int64)
+        self.last_time = np.zeros(capacity)  # time of the last created point
+
+    def add(self, index):
+        self.ensure_capacity(index + 1)
+
+        self.head[index] = self.size[index] = 0
+        self.last_time[index] = self.universe.age
+
+    def ensure_capacity(self, n):
+        if n > self.capacity:
+            self.grow(max(n, self.capacity * 2))
+
+    def load(self, x, y, times, head, size, last_time):  # absolute points
+        n = len(head)
+        self.ensure_capacity(n)
+        root_x, root_y = self.get_root_centers(n)
+        self.x[:n] = x - root_x
+        self.y[:n] = y - root_y
+        self.times[:n] = times
+        self.head[:n] = head
+        self.size[:n] = size
+        self.last_time[:n] = last_time
+        self.n_points = int(size.sum())
+
+    def grow(self, capacity):
+        old_capacity = self.capacity
+        self.capacity = capacity
+        for attr in ("x", "y", "times"):
+            grown = np.zeros((self.capacity, self.length), dtype=getattr(self, attr).dtype)
+            grown[:old_capacity] = getattr(self, attr)
+            setattr(self, attr, grown)
+
+        self.head = np.resize(self.head, self.capacity)
+        self.size = np.resize(self.size, self.capacity)
+        self.last_time = np.resize(self.last_time, self.capacity)
+
+    def remove(self, removed):  # same as OrbitEngine.remove
+        n = len(removed)
+        kept = ~removed
+        n_kept = int(np.count_nonzero(kept))
+        for column in ("x", "y", "times", "head", "size", "last_time"):
+            array = getattr(self, column)
+            array[:n_kept] = array[:n][kept]
+
+        self.n_points = int(self.size[:n_kept].sum())
+
+    def clear(self):
+        self.head[:] = self.size[:] = 0
+        self.last_time[:] = self.universe.age
+        self.n_points = 0
+
+    def tick(self, now):
+        orbit_engine = self.universe.orbit_engine
+        n = orbit_engine.n
+        head = self.head[:n]
+        size = self.size[:n]
+        rows = np.arange(n)
+
+        # expiring is just moving the head, usually at most one point per body per tick
+        while True:
+            expired = np.flatnonzero(size > 0)
+            expired = expired[now - self.times[expired, head[expired]] >= self.max_age]
+            if not len(expired):
+                break
+
+            head[expired] = (head[expired] + 1) % self.length
+            size[expired] -= 1
+            self.n_points -= len(expired)
+
+        # stars don't leave a trace
+        due = rows[(orbit_engine.host_index[:n] >= 0) &
+                   (now - self.last_time[:n] >= 1 / self.frequency)]
+        if not len(due):
+            return
+
+        orbit_engine.update_positions()
+        tail = (head[due] + size[due]) % self.length
+        root_index = orbit_engine.root_index[due]
+        self.x[due, tail] = orbit_engine.abs_x[due] - orbit_engine.abs_x[root_index]
+        self.y[due, tail] = orbit_engine.abs_y[due] - orbit_engine.abs_y[root_index]
+        self.times[due, tail] = now
+        self.last_time[due] = now
+
+        # a full row overwrites its oldest point
+        full = size[due] == self.length
+        head[due[full]] = (head[due[full]] + 1) % self.length
+        size[due[~full]] += 1
+        self.n_points += int(np.count_nonzero(~full))
+
+    def get_root_centers(self, n):  # as columns, to offset whole rows
+        orbit_engine = self.universe.orbit_engine
+        orbit_engine.update_positions()
+        root_index = orbit_engine.root_index[:n]
+        return orbit_engine.abs_x[root_index, None], orbit_engine.abs_y[root_index, None]
+
+    def get_abs_points(self, n):  # every row of the first n bodies, e.g. for saving
+        root_x, root_y = self.get_root_centers(n)
+        return self.x[:n] + root_x, self.y[:n] + root_y
+
+    def get_points(self, index):  # absolute, from oldest to newest
+        orbit_engine = self.universe.orbit_engine
+        root_index = orbit_engine.root_index[index]
+        order = (self.head[index] + np.arange(self.size[index])) % self.length
+        x = self.x[index, order] + orbit_engine.abs_x[root_index]
+        y = self.y[index, order] + orbit_engine.abs_y[root_index]
+        ages = self.universe.age - self.times[index, order]
+        return x, y, ages
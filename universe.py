@@ -2,44 +2,155 @@ from globals import *
 from camera import Camera
 from console import Console
 from environment.environment import Environment
+from galaxy import Galaxy
+from profiler import Profiler
+from random_stream import RandomStream
+from recording import Recorder
 from render.render import Render
+from snapshot import load_snapshot, load_template, save_snapshot, save_template
+from space.orbit_engine import OrbitEngine
+from space.shard_pool import ShardPool
+from space.spatial_grid import SpatialGrid
 from space.star import Star
+from space.trace_buffer import TraceBuffer
 
 
 class Universe:
-    def __init__(self):
-        print("Universe init...")
+    def __init__(self, headless=False, generate=True):  # without generating, it starts empty until reset
+        log.info("Universe init...")
+        self.headless = headless  # no window, font or rendering
         self.age = 0
         self.age_real_time = 0
         self.celestial_bodies = []
+        # lookups without scanning all bodies, kept up to date on add, rename and removal
+        self.celestials_by_uuid = {}
+        self.celestials_by_name = {}  # lowercase name: [celestial], a name is found as the body indexed first
+        self.celestials_by_type = {}  # type: {uuid: celestial}
         self.n_ticks = 0
         self.paused = False
         self.time_factor = DEFAULT_TIME_FACTOR
         self.next_uuid = 1
+        self.n_stars = 0
+        self.seed = None  # of the last reset
+        self.rng = RandomStream(UNIVERSE_SEED)  # everything generated draws from this, new on every reset
+        self.orbit_engine = OrbitEngine()
+        self.trace_buffer = TraceBuffer(self)
+        self.spatial_grid = SpatialGrid(self)
+        self.recorder = None
+        self.replay = None  # set when playing a recording back instead of simulating
+        self.shard_pool = None
 
+        self.profiler = Profiler(recording=PROFILER_EXPORT_PATH is not None)
         self.camera = Camera(self)
         self.console = Console(self)
         self.environment = Environment(self)
-        self.font = pg.font.SysFont("Comic Sans MS", 20)
-        self.render = Render(self)
-        self.screen: pg.Surface = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.galaxy = Galaxy(self)
+        self.loaded_font = None  # scanning the system fonts is slow, only done once text is drawn
+        self.render = None if headless else Render(self)
+        self.screen: pg.Surface = None if headless else pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
-        self.reset()
-        print("Universe init")
+        if generate:
+            self.reset()
+        log.info("Universe init")
 
-    def reset(self):
-        print("Resetting universe")
+    @property
+    def font(self):
+        if self.loaded_font is None and not self.headless:
+            self.loaded_font = pg.font.SysFont(FONT_NAME, FONT_SIZE)
+
+        return self.loaded_font
+
+    def clear(self):
         self.celestial_bodies.clear()
-        self.add_star()
+        self.celestials_by_uuid.clear()
+        self.celestials_by_name.clear()
+        self.celestials_by_type.clear()
+        self.orbit_engine.clear()
+        self.trace_buffer.clear()
+        self.n_stars = 0
+        self.next_uuid = 1  # the same seed gives the same uuids and names too
+        self.camera.clear_locked_celestial()
+        self.galaxy.clear()
+        self.replay = None
+
+    def reset(self, n_stars=1, n_planets=10, seed=None):
+        self.seed = seed if seed is not None else UNIVERSE_SEED
+        if self.seed is None:  # still logged, so a universe can be generated again
+            self.seed = random.randrange(2 ** 32)
+        if self.seed < 0:
+            raise ValueError(f"Seed {self.seed} is negative")
+
+        log.info(f"Resetting universe, seed {self.seed}")
+        self.clear()
+        self.rng = RandomStream(self.seed)
+        if PROCEDURAL_GALAXY:
+            self.galaxy.reset(seed)
+            return
+
+        for i in range(n_stars):
+            self.add_star(n_planets)
 
     def add_star(self, n_planets=10):
-        star = Star(self, abs_center=(len(self.get_stars()) * STAR_DISTANCE, 0),
+        star = Star(self, abs_center=(self.n_stars * STAR_DISTANCE, 0),
                     n_planets=n_planets)
         return star
 
+    def add_celestial(self, celestial):
+        self.celestial_bodies.append(celestial)
+        self.index_celestial(celestial)
+
+    def index_celestial(self, celestial):
+        self.celestials_by_uuid[celestial.uuid] = celestial
+        self.celestials_by_name.setdefault(celestial.name.lower(), []).append(celestial)
+        self.celestials_by_type.setdefault(type(celestial), {})[celestial.uuid] = celestial
+
+    def unindex_celestial(self, celestial):
+        self.celestials_by_uuid.pop(celestial.uuid, None)
+        named = self.celestials_by_name.get(celestial.name.lower(), [])
+        if celestial in named:
+            named.remove(celestial)
+            if not named:
+                del self.celestials_by_name[celestial.name.lower()]
+        self.celestials_by_type.get(type(celestial), {}).pop(celestial.uuid, None)
+
+    def find_celestial(self, text):  # by uuid or name
+        text = text.strip()
+        if text.isdigit() and int(text) in self.celestials_by_uuid:
+            return self.celestials_by_uuid[int(text)]
+
+        named = self.celestials_by_name.get(text.lower())
+        return named[0] if named else None
+
+    def remove_celestials(self, celestials):  # hosts only together with all their guests
+        removed = np.zeros(len(self.celestial_bodies), dtype=bool)
+        removed[[celestial.index for celestial in celestials]] = True
+
+        for celestial in celestials:
+            self.unindex_celestial(celestial)
+            if celestial.host is not None and not removed[celestial.host.index]:
+                celestial.host.guests.remove(celestial)
+
+            if type(celestial) == Star:
+                self.n_stars -= 1
+
+        if self.camera.locked_celestial is not None and removed[self.camera.locked_celestial.index]:
+            self.camera.clear_locked_celestial()
+
+        if self.environment.celestial_body is not None and removed[self.environment.celestial_body.index]:
+            self.environment.leave_celestial()
+
+        self.orbit_engine.remove(removed)
+        self.trace_buffer.remove(removed)
+        self.celestial_bodies[:] = [celestial for celestial, is_removed in
+                                    zip(self.celestial_bodies, removed) if not is_removed]
+        for index, celestial in enumerate(self.celestial_bodies):
+            celestial.index = index
+
+        if self.render:
+            self.render.force_full_update = True  # removed bodies leave no dirty rect behind
+
     def get_stars(self):
-        return [celestial for celestial in self.celestial_bodies
-                if type(celestial) == Star]
+        return list(self.celestials_by_type.get(Star, {}).values())
 
     def tick(self, dt):
         dt_adjusted = dt * self.time_factor
@@ -47,16 +158,36 @@ class Universe:
         self.age_real_time += dt
         self.age += dt_adjusted
 
-        for celestial in self.celestial_bodies:
-            celestial.tick(dt_adjusted)
+        self.orbit_engine.store_previous_positions()
+        if self.shard_pool:
+            self.shard_pool.tick(dt_adjusted)
+        else:
+            self.orbit_engine.tick(dt_adjusted)
+
+        if not (VECTORIZED_ORBITS or ANALYTIC_ORBITS):  # otherwise the orbit engine already moved every body
+            for celestial in self.celestial_bodies:
+                celestial.tick(dt_adjusted)
+
+        self.orbit_engine.update_positions()
+        self.trace_buffer.tick(self.age)
+
+        with self.profiler.scope("environment"):
+            self.environment.tick(dt_adjusted)
 
-        self.environment.tick(dt_adjusted)
+        if self.recorder:
+            self.recorder.tick()
 
-    def draw(self):  # todo check: cel.draw() for cel in self.cel_bodies ???
-        for star in self.get_stars():
-            star.draw()
-            for guest in star.get_guests(recursive=True):
-                guest.draw()
+    def draw(self, celestials):  # hosts come before their guests, so guests are on top
+        return [celestial.draw() for celestial in celestials]
+
+    def get_visible_objects(self):
+        indices = self.spatial_grid.query_rect(*self.camera.get_abs_screen_rect())
+
+        # guests too close to their host on screen are drawn as part of it
+        min_dist = LOD_MIN_ORBIT_PIXELS / self.camera.get_zoom()
+        indices = indices[(self.orbit_engine.host_index[indices] < 0) |
+                          (self.orbit_engine.dist[indices] >= min_dist)]
+        return [self.celestial_bodies[index] for index in indices]
 
     def set_time_factor(self, new_time):
         try:
@@ -67,13 +198,77 @@ class Universe:
 
         self.time_factor = new_time
 
-    def create_from_template(self):
-        print(self, "todo")  # todo implement loading from template (json or w/e)
+    def set_age(self, new_age):  # jump to any point in time
+        try:
+            new_age = float(new_age)
+        except ValueError as ex:
+            print(f"{ex}: {new_age}")
+            return
+
+        if self.replay:
+            self.replay.seek_age(new_age)
+        else:
+            self.age = new_age
+            self.orbit_engine.set_time(new_age)
+            self.trace_buffer.clear()  # the trails would connect both points in time
+
+        print(f"Jumped to age {self.age}s")
+
+    def start_sharding(self, n_processes):
+        self.stop_sharding()
+        if n_processes > 0:
+            self.shard_pool = ShardPool(self, n_processes)
+
+    def stop_sharding(self):
+        if self.shard_pool:
+            self.shard_pool.stop()
+            self.shard_pool = None
+
+    def start_recording(self, path):
+        self.stop_recording()
+        try:
+            self.recorder = Recorder(self, path)
+        except OSError as ex:
+            print(f"Could not record to {path}: {ex}")
+
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def create_from_template(self, path):
+        try:
+            load_template(self, path)
+        except (OSError, ValueError, KeyError) as ex:
+            print(f"Could not load template {path}: {ex}")
+
+    def save_as_template(self, path):
+        try:
+            save_template(self, path)
+        except OSError as ex:
+            print(f"Could not save template {path}: {ex}")
+
+    def save(self, path, include_traces=False):
+        try:
+            save_snapshot(self, path, include_traces)
+        except OSError as ex:
+            print(f"Could not save {path}: {ex}")
+
+    def load(self, path):
+        try:
+            load_snapshot(self, path)
+        except (OSError, ValueError, KeyError) as ex:
+            print(f"Could not load {path}: {ex}")
+
+    def get_hovered_objects(self):  # topmost first
+        mouse_abs_x, mouse_abs_y = self.camera.calculate_abs_pos(pg.mouse.get_pos())
+        return [self.celestial_bodies[index] for index in
+                reversed(self.spatial_grid.query_point(mouse_abs_x, mouse_abs_y))]
 
     def get_hovered_object(self):
-        for celestial in self.celestial_bodies:
-            if celestial.is_hovered():
-                return celestial  # todo its possible to hover over 2+ celestial bodies, implement
+        hovered_objects = self.get_hovered_objects()
+        if hovered_objects:
+            return hovered_objects[0]
 
     def get_new_uuid(self):
         old = self.next_uuid